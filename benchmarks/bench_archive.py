@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from notion_client import Client
+
+from benchmarks.fake_notion import FakeNotion
+
+# Compares the old serial "Clear & Start New Round" loop with shared.bulk
+# against a local fake Notion that adds latency and enforces a rate limit.
+# The bulk client goes through NotionTransport, which paces and retries.
+# Expect "throttled": 0 for both. Bulk is bound by the rate limit, so it
+# pulls ahead of serial by as much as a request's latency exceeds 1 / RATE.
+#   python -m benchmarks.bench_archive --rows 150 --latency 0.35 --rate-limit 3
+
+DATABASE_ID = "bench-budget"
+
+
+def _seed(fake, rows):
+    for i in range(rows):
+        fake.add_page(DATABASE_ID, {
+            "Item": {"title": [{"text": {"content": f"Item {i}"}}]},
+            "Cost": {"number": 10.0},
+            "Who": {"select": {"name": "Leandro"}},
+            "Date": {"date": {"start": "2026-01-01"}},
+            "Archived": {"checkbox": False},
+        })
+    return list(fake.pages)
+
+
+def _serial(notion, page_ids):
+    for page_id in page_ids:
+        notion.pages.update(page_id=page_id, properties={"Archived": {"checkbox": True}})
+    return len(page_ids), 0
+
+
+def _bulk(notion, page_ids):
+    from shared import bulk
+    from shared.metrics import Metrics
+    from shared.transport import CircuitBreaker, NotionTransport, TokenBucket
+    transport = NotionTransport(bucket=TokenBucket(), breaker=CircuitBreaker(), metrics=Metrics())
+    notion = Client(auth="bench", base_url=notion.options.base_url, client=httpx.Client(transport=transport))
+    bulk.start(DATABASE_ID, page_ids)
+    done, failed = bulk.archive_pending(notion, DATABASE_ID)
+    return len(done), len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=150)
+    parser.add_argument("--latency", type=float, default=0.35)
+    parser.add_argument("--rate-limit", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("MIRROR_PATH", os.path.join(tempfile.mkdtemp(), "mirror.db"))
+    report = {"rows": args.rows, "latency": args.latency, "rate_limit": args.rate_limit}
+    for name, strategy in (("serial", _serial), ("bulk", _bulk)):
+        fake = FakeNotion(latency=args.latency, rate_limit=args.rate_limit).start()
+        try:
+            page_ids = _seed(fake, args.rows)
+            notion = Client(auth="bench", base_url=fake.url)
+            started = time.perf_counter()
+            try:
+                archived, failed = strategy(notion, page_ids)
+                error = None
+            except Exception as e:
+                archived, failed, error = None, None, str(e)
+            report[name] = {
+                "seconds": round(time.perf_counter() - started, 3),
+                "archived": archived,
+                "failed": failed,
+                "requests": len(fake.calls),
+                "throttled": fake.throttled,
+                "error": error,
+            }
+        finally:
+            fake.stop()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import statistics
+import time
+
+import httpx
+from notion_client import Client
+
+from benchmarks.fake_notion import FakeNotion
+
+# Latency of the first Notion call of a rerun: a new Client per rerun (the old
+# module-top pattern) versus one pooled client reused across reruns.
+# Uses the real API when NOTION_TOKEN and DATABASE_ID are set, else a fake.
+#   python -m benchmarks.bench_client --reruns 30
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 1),
+        "p90_ms": round(samples[int(len(samples) * 0.9) - 1] * 1000, 1),
+    }
+
+
+def _first_call(notion, database_id):
+    started = time.perf_counter()
+    notion.databases.query(database_id=database_id, page_size=1)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    token = os.environ.get("NOTION_TOKEN")
+    database_id = os.environ.get("DATABASE_ID")
+    fake = None
+    base_url = "https://api.notion.com"
+    if not (token and database_id):
+        fake = FakeNotion(latency=args.latency).start()
+        token, database_id, base_url = "bench", "bench-budget", fake.url
+
+    try:
+        fresh = []
+        for _ in range(args.reruns):
+            notion = Client(auth=token, base_url=base_url)
+            fresh.append(_first_call(notion, database_id))
+            notion.close()
+
+        pooled_http = httpx.Client(limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=120))
+        pooled = Client(auth=token, base_url=base_url, client=pooled_http)
+        _first_call(pooled, database_id)
+        shared = [_first_call(pooled, database_id) for _ in range(args.reruns)]
+    finally:
+        if fake:
+            fake.stop()
+
+    print(json.dumps({
+        "target": "fake" if fake else "notion",
+        "reruns": args.reruns,
+        "client_per_rerun": _percentiles(fresh),
+        "pooled_client": _percentiles(shared),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
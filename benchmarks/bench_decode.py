@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from shared import schema
+
+# Throughput and peak memory of the schema decoder versus the per-row dict
+# loop the pages used before, on synthetic Tax Receipts pages.
+#   python -m benchmarks.bench_decode --pages 50000
+
+
+def synthetic_pages(n, seed=0):
+    rng = random.Random(seed)
+    categories = ["Health", "Business", "Home Office", "Vehicle/Transportation", "School"]
+    pages = []
+    for i in range(n):
+        pages.append({
+            "id": f"page-{i}",
+            "properties": {
+                "Description": {"type": "title", "title": [{"type": "text", "text": {"content": f"Receipt {i}"}}]},
+                "Amount": {"type": "number", "number": round(rng.uniform(1, 500), 2)},
+                "Category": {"type": "select", "select": {"name": rng.choice(categories)}},
+                "Who": {"type": "select", "select": {"name": rng.choice(["Leandro", "Jonas"])}},
+                "Date": {"type": "date", "date": {"start": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"}},
+                "Year": {"type": "select", "select": {"name": rng.choice(["2025", "2026"])}},
+                "Receipt": {"type": "url", "url": f"https://res.cloudinary.com/x/{i}.jpg" if i % 3 else None},
+            },
+        })
+    return pages
+
+
+def legacy_decode(results):
+    rows = []
+    for page in results:
+        p = page["properties"]
+        title_list = p.get("Description", {}).get("title", [])
+        desc_val = title_list[0]["text"]["content"] if title_list else ""
+        date_val = p.get("Date", {}).get("date", {})
+        date_str = date_val.get("start", "No Date") if date_val else "No Date"
+        category_val = p.get("Category", {}).get("select") or {}
+        who_val = p.get("Who", {}).get("select") or {}
+        year_val = p.get("Year", {}).get("select") or {}
+        receipt_url = p.get("Receipt", {}).get("url", "") or ""
+        rows.append({
+            "Date": date_str,
+            "Description": desc_val,
+            "Amount": p.get("Amount", {}).get("number") or 0.0,
+            "Category": category_val.get("name", "Unknown"),
+            "Who": who_val.get("name", "Unknown"),
+            "Year": year_val.get("name", "Unknown"),
+            "Receipt URL": receipt_url,
+        })
+    return pd.DataFrame(rows)
+
+
+def _measure(fn, pages):
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = fn(pages)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(len(pages) / seconds),
+        "peak_alloc_mb": round(peak / 2**20, 2),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50_000)
+    args = parser.parse_args()
+    pages = synthetic_pages(args.pages)
+    print(json.dumps({
+        "pages": args.pages,
+        "legacy_loop": _measure(legacy_decode, pages),
+        "schema_decode": _measure(lambda p: schema.decode(p, schema.TAX), pages),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
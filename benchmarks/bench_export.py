@@ -0,0 +1,116 @@
+import argparse
+import io
+import json
+import os
+import threading
+import time
+import tracemalloc
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from shared import export
+
+# Receipt ZIP export against a local file server that answers every GET with
+# `size` bytes after `latency` seconds (paths ending in /missing.jpg get 404).
+# Compares one download at a time with the bounded pool. zip_file returns the
+# archive as bytes (what st.download_button accepts), so the peak includes it.
+#   python -m benchmarks.bench_export --receipts 200 --latency 0.1
+
+
+class FileServer:
+    def __init__(self, size=300_000, latency=0.05):
+        self.size = size
+        self.latency = latency
+        self.body = os.urandom(size)
+        self.server = None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(fake.latency)
+                if self.path.endswith("/missing.jpg"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(fake.size))
+                self.end_headers()
+                self.wfile.write(fake.body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def receipts(url, count):
+    # Every tenth receipt has two files; one receipt points at a missing file.
+    return pd.DataFrame({
+        "Date": [f"2025-{i % 12 + 1:02d}-15" for i in range(count)],
+        "Description": [f"Receipt {i}" for i in range(count)],
+        "Amount": [1000 + i for i in range(count)],
+        "Category": ["Health"] * count,
+        "Who": ["Leandro"] * count,
+        "Year": ["2025"] * count,
+        "Receipt URL": [
+            f"{url}/missing.jpg" if i == 0
+            else f"{url}/r/{i}.jpg | {url}/r/{i}b.jpg" if i % 10 == 0
+            else f"{url}/r/{i}.jpg"
+            for i in range(count)
+        ],
+    })
+
+
+def measure(df, workers):
+    tracemalloc.start()
+    started = time.perf_counter()
+    archive = export.zip_file(df, workers=workers)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        names = zf.namelist()
+        listed = zf.read("missing.txt").decode().splitlines() if "missing.txt" in names else []
+        missing = sum(line.startswith("receipts/") for line in listed)
+    return {
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "files": sum(n.startswith("receipts/") for n in names),
+        "missing": missing,
+        "archive_mb": round(len(archive) / 2**20, 1),
+        "peak_python_mb": round(peak / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = FileServer(args.size, args.latency).start()
+    try:
+        df = receipts(server.url, args.receipts)
+        print(json.dumps([measure(df, 1), measure(df, export.FETCH_WORKERS)], indent=2))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+# Page reruns, Notion calls and DataFrame builds caused by each UI interaction
+# on the Budget page, driven headlessly with Streamlit's AppTest against the
+# fake Notion. --baseline is the page as it was before the fragments and the
+# sync TTL: st.fragment is a plain function call and SYNC_TTL=0 syncs with
+# Notion on every rerun.
+#
+# AppTest reruns the whole script on every run(), fragments or not, so
+# page_reruns is the same in both modes; that a form keystroke reruns only
+# its fragment shows in a browser session, not here.
+#   python -m benchmarks.bench_interactions --rows 200
+#   python -m benchmarks.bench_interactions --rows 200 --baseline
+
+from benchmarks.fake_notion import FakeNotion
+
+DATABASE_ID = "bench-budget"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--baseline", action="store_true", help="no fragments, sync on every rerun")
+    args = parser.parse_args()
+
+    fake = FakeNotion().start()
+    for i in range(args.rows):
+        fake.add_page(DATABASE_ID, {
+            "Item": {"title": [{"text": {"content": f"Safeway: item {i}"}}]},
+            "Cost": {"number": 12.5},
+            "Who": {"select": {"name": "Leandro" if i % 2 else "Jonas"}},
+            "Date": {"date": {"start": "2026-01-01"}},
+            "Archived": {"checkbox": False},
+        })
+    os.environ.update({
+        "NOTION_TOKEN": "bench",
+        "NOTION_BASE_URL": fake.url,
+        "DATABASE_ID": DATABASE_ID,
+        "MIRROR_PATH": os.path.join(tempfile.mkdtemp(), "mirror.db"),
+        "TRACE_LOG_LEVEL": "WARNING",
+    })
+    if args.baseline:
+        os.environ["SYNC_TTL"] = "0"
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    if args.baseline:
+        # Before the pages import shared.data, whose watch() is a fragment too.
+        def fragment(func=None, **kwargs):
+            return func if func is not None else (lambda f: f)
+
+        st.fragment = fragment
+
+    from shared import schema, trace
+
+    builds = {"count": 0}
+    decode = schema.decode
+
+    def counting_decode(*a, **kw):
+        builds["count"] += 1
+        return decode(*a, **kw)
+
+    schema.decode = counting_decode
+    # trace.begin() runs once per full-page rerun; fragment reruns skip it.
+    begin = trace.begin
+
+    def counting_begin(*a, **kw):
+        builds["page_runs"] += 1
+        return begin(*a, **kw)
+
+    builds["page_runs"] = 0
+    trace.begin = counting_begin
+    app = AppTest.from_file("../budget_app.py", default_timeout=60)
+    report = []
+
+    def step(name, action):
+        calls, built, runs = len(fake.calls), builds["count"], builds["page_runs"]
+        started = time.perf_counter()
+        action()
+        report.append({
+            "interaction": name,
+            "seconds": round(time.perf_counter() - started, 3),
+            "page_reruns": builds["page_runs"] - runs,
+            "notion_calls": len(fake.calls) - calls,
+            "frame_builds": builds["count"] - built,
+        })
+
+    try:
+        step("first load", app.run)
+        step("first load (warm mirror)", app.run)
+        step("pick store", lambda: app.selectbox(key="category_0").select("Safeway").run())
+        step("type details", lambda: app.text_input(key="details_0").input("Milk").run())
+        step("type amount", lambda: app.number_input(key="cost_0").set_value(4.5).run())
+        step("pick payer", lambda: app.selectbox(key="who_0").select("Jonas").run())
+        step("add expense", lambda: app.button(key="add_btn").click().run())
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+    finally:
+        schema.decode = decode
+        trace.begin = begin
+        fake.stop()
+    print(json.dumps({"rows": args.rows, "baseline": args.baseline, "steps": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
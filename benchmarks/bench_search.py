@@ -0,0 +1,61 @@
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.bench_decode import synthetic_pages
+from shared import schema, search
+
+# Search index over synthetic Tax Receipts pages: full build, incremental
+# refresh after one edited row, and query latency (first and repeated).
+#   python -m benchmarks.bench_search --pages 100000
+
+WORDS = ["walmart groceries", "physio session", "costco gas", "dentist cleaning", "pharmacy", "uber ride"]
+QUERIES = ["walmart march", "physio 2025", "dentist march leandro", "45", "2025-03", "uber jonas"]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = synthetic_pages(args.pages)
+    for page in pages:
+        page["properties"]["Description"]["title"][0]["text"]["content"] = f"{rng.choice(WORDS)} {page['id']}"
+    df = schema.decode(pages, schema.TAX)
+
+    index = search.SearchIndex(schema.TAX)
+    started = time.perf_counter()
+    index.refresh(df)
+    report = {"pages": args.pages, "build_ms": _ms(time.perf_counter() - started)}
+
+    edited = df.copy()
+    edited.loc[edited.index[0], "Description"] = "chiropractor visit"
+    started = time.perf_counter()
+    index.refresh(edited)
+    report["refresh_one_edit_ms"] = _ms(time.perf_counter() - started)
+
+    report["queries"] = []
+    for text in QUERIES:
+        started = time.perf_counter()
+        found = index.query(text)
+        first = time.perf_counter() - started
+        times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            index.query(text)
+            times.append(time.perf_counter() - started)
+        report["queries"].append({"query": text, "matches": len(found), "first_ms": _ms(first),
+                                  "median_ms": _ms(statistics.median(times))})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
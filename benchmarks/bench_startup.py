@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.fake_notion import FakeNotion
+from benchmarks.harness import ROOT, SCRIPTS, seed
+
+# Cold start of each page in a fresh interpreter: import time of the heavy
+# modules (python -X importtime) and time to first paint, i.e. when the
+# header span ends in the rerun's trace line.
+#   python -m benchmarks.bench_startup --pages 1000
+
+MODULES = ["streamlit", "pandas", "numpy", "httpx", "notion_client", "cloudinary", "PIL", "shared"]
+
+_CHILD = """
+import sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+print("WALL", (time.perf_counter() - started) * 1000)
+"""
+
+
+def _imports(stderr):
+    # "import time: self [us] | cumulative | imported package"; each module
+    # appears once, and its cumulative time includes what it imported.
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() in MODULES and cumulative.strip().isdigit():
+            totals[name.strip()] = round(int(cumulative) / 1000, 1)
+    return totals
+
+
+def measure(script, pages):
+    fake = FakeNotion().start()
+    database_id = f"bench-{script}"
+    seed(fake, script, database_id, pages)
+    env = dict(
+        os.environ,
+        NOTION_TOKEN="bench",
+        NOTION_BASE_URL=fake.url,
+        MIRROR_PATH=os.path.join(tempfile.mkdtemp(), "mirror.db"),
+        **{SCRIPTS[script][1]: database_id},
+    )
+    try:
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, os.path.join(ROOT, SCRIPTS[script][0])],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+        )
+    finally:
+        fake.stop()
+    result = {"script": script, "pages": pages, "import_ms": _imports(out.stderr)}
+    for line in out.stdout.splitlines():
+        if line.startswith("WALL"):
+            result["process_ms"] = round(float(line.split()[1]), 1)
+        elif line.startswith("{"):
+            rerun = json.loads(line)
+            header = next((s for s in rerun["spans"] if s["name"] == "header"), None)
+            result["first_paint_ms"] = round(header["start_ms"] + header["ms"], 1) if header else None
+            result["rerun_ms"] = rerun["ms"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--scripts", nargs="+", default=list(SCRIPTS), choices=list(SCRIPTS))
+    args = parser.parse_args()
+    print(json.dumps([measure(script, args.pages) for script in args.scripts], indent=2))
+
+
+if __name__ == "__main__":
+    main()
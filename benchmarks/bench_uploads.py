@@ -0,0 +1,57 @@
+import argparse
+import io
+import json
+import random
+import time
+
+from PIL import Image
+
+from benchmarks.fake_cloudinary import LocalUploader
+from shared import uploads
+
+# Serial full-size uploads (the old Add Receipt loop) versus shared.uploads on
+# a simulated mobile uplink. Photos are synthetic 12 MP JPEGs.
+#   python -m benchmarks.bench_uploads --photos 4 --bandwidth 250000
+
+
+def _photo(seed, size=(4032, 3024)):
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size[0] // 16, size[1] // 16))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(image.width * image.height)])
+    out = io.BytesIO()
+    image.resize(size, Image.BILINEAR).save(out, format="JPEG", quality=95)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photos", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--bandwidth", type=int, default=250_000, help="uplink bytes per second")
+    args = parser.parse_args()
+
+    files = [(f"receipt_{i}.jpg", _photo(i)) for i in range(args.photos)]
+    original = sum(len(d) for _, d in files)
+
+    serial = LocalUploader(args.latency, args.bandwidth)
+    started = time.perf_counter()
+    for name, data in files:
+        serial(name, data)
+    serial_seconds = time.perf_counter() - started
+
+    pooled = LocalUploader(args.latency, args.bandwidth)
+    started = time.perf_counter()
+    uploads.upload_all(files, upload=pooled)
+    pooled_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "photos": args.photos,
+        "original_bytes": original,
+        "serial": {"seconds": round(serial_seconds, 2), "bytes": serial.bytes},
+        "parallel_compressed": {"seconds": round(pooled_seconds, 2), "bytes": pooled.bytes},
+        "bytes_saved": original - pooled.bytes,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
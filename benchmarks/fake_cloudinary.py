@@ -0,0 +1,28 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+# Local stand-in for cloudinary.uploader.upload. It simulates a slow uplink
+# (fixed latency plus bytes / bandwidth) and keeps the files on disk.
+
+
+class LocalUploader:
+    def __init__(self, latency=0.3, bandwidth=250_000, directory=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.directory = directory or tempfile.mkdtemp(prefix="fake_cloudinary_")
+        self.lock = threading.Lock()
+        self.uploads = 0
+        self.bytes = 0
+
+    def __call__(self, name, data, folder="tax_receipts"):
+        time.sleep(self.latency + len(data) / self.bandwidth)
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}_{os.path.basename(name)}")
+        with open(path, "wb") as f:
+            f.write(data)
+        with self.lock:
+            self.uploads += 1
+            self.bytes += len(data)
+        return "file://" + path
@@ -0,0 +1,269 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Local stand-in for the parts of the Notion API the app uses:
+# databases/{id}/query, pages (create) and pages/{id} (update), plus the
+# Cloudinary upload endpoint. Point the app at it with
+# NOTION_BASE_URL=server.url and CLOUDINARY_UPLOAD_PREFIX=server.url.
+# Trashed pages (trash(), or PATCH with in_trash/archived) drop out of
+# queries, and failing_creates makes the next creates store the page but
+# answer 502, like a gateway timing out after Notion did the work.
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _prop_value(prop):
+    kind = prop.get("type") or next(iter(prop))
+    return kind, prop.get(kind)
+
+
+def _matches(page, flt):
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(_matches(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(_matches(page, f) for f in flt["or"])
+    if flt.get("timestamp") in ("last_edited_time", "created_time"):
+        stamp = flt["timestamp"]
+        return page[stamp] >= flt[stamp]["on_or_after"]
+    prop = page["properties"].get(flt.get("property"), {})
+    if "checkbox" in flt:
+        return bool(prop.get("checkbox")) == flt["checkbox"]["equals"]
+    if "title" in flt:
+        text = "".join(t["text"]["content"] for t in prop.get("title") or [])
+        return text == flt["title"]["equals"]
+    if "number" in flt:
+        return prop.get("number") == flt["number"]["equals"]
+    if "select" in flt:
+        return (prop.get("select") or {}).get("name") == flt["select"]["equals"]
+    if "date" in flt:
+        start = (prop.get("date") or {}).get("start")
+        if start is None:
+            return False
+        cond = flt["date"]
+        if "equals" in cond and start != cond["equals"]:
+            return False
+        if "on_or_after" in cond and start < cond["on_or_after"]:
+            return False
+        if "on_or_before" in cond and start > cond["on_or_before"]:
+            return False
+        return True
+    raise ValueError(f"Unsupported filter: {flt}")
+
+
+def _sort_key(prop_name):
+    def key(page):
+        prop = page["properties"].get(prop_name, {})
+        kind, value = _prop_value(prop) if prop else (None, None)
+        if kind == "date":
+            return (value or {}).get("start") or ""
+        if kind in ("title", "rich_text"):
+            return "".join(t["text"]["content"] for t in value or [])
+        if kind == "select":
+            return (value or {}).get("name") or ""
+        return value if value is not None else 0
+    return key
+
+
+class FakeNotion:
+    def __init__(self, latency=0.0, rate_limit=None, retry_after=1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.calls = []
+        self.throttled = 0
+        self.uploaded_bytes = 0
+        self._version = 0
+        self._results = {}
+        self._recent = deque()
+        self.failing_creates = 0
+        self.server = None
+
+    # --- Seeding ---
+    def add_page(self, database_id, properties, edited=None):
+        page_id = str(uuid.uuid4())
+        stamp = edited or _now()
+        self.pages[page_id] = {
+            "object": "page",
+            "id": page_id,
+            "created_time": stamp,
+            "last_edited_time": stamp,
+            "parent": {"type": "database_id", "database_id": database_id},
+            "properties": properties,
+        }
+        self._version += 1
+        return self.pages[page_id]
+
+    def trash(self, page_id):
+        with self.lock:
+            self.pages[page_id]["in_trash"] = True
+            self.pages[page_id]["last_edited_time"] = _now()
+            self._version += 1
+
+    def live(self, database_id):
+        return [p for p in self.pages.values()
+                if p["parent"]["database_id"] == database_id and not p.get("in_trash")]
+
+    # --- Server ---
+    def start(self, port=0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def _throttle(self):
+        # Sliding one-second window, like Notion's average request limit.
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.rate_limit:
+                self.throttled += 1
+                return True
+            self._recent.append(now)
+        return False
+
+    # --- Endpoints ---
+    def query(self, database_id, body, params):
+        # Filtered, sorted results are memoised per query until the next write,
+        # so paging through 100k seeded pages stays linear.
+        memo = (database_id, json.dumps(body.get("filter")), json.dumps(body.get("sorts")), self._version)
+        pages = self._results.get(memo)
+        if pages is None:
+            pages = [p for p in self.live(database_id) if _matches(p, body.get("filter"))]
+            for sort in reversed(body.get("sorts") or []):
+                pages.sort(key=_sort_key(sort["property"]), reverse=sort.get("direction") == "descending")
+            self._results = {memo: pages}
+        start = int(body.get("start_cursor") or 0)
+        size = min(int(body.get("page_size") or 100), 100)
+        chunk = pages[start:start + size]
+        wanted = params.get("filter_properties")
+        if wanted:
+            chunk = [dict(p, properties={k: v for k, v in p["properties"].items() if k in wanted}) for p in chunk]
+        more = start + size < len(pages)
+        return {
+            "object": "list",
+            "results": chunk,
+            "has_more": more,
+            "next_cursor": str(start + size) if more else None,
+        }
+
+    def create(self, body):
+        # (page, failed): failed pages were stored but must be answered with a 502.
+        page = self.add_page(body["parent"]["database_id"], body.get("properties", {}))
+        with self.lock:
+            failed = self.failing_creates > 0
+            self.failing_creates -= failed
+        return page, failed
+
+    def update(self, page_id, body):
+        page = self.pages.get(page_id)
+        if page is None or page.get("in_trash"):
+            return None
+        with self.lock:
+            page["properties"].update(body.get("properties", {}))
+            if body.get("in_trash") or body.get("archived"):
+                page["in_trash"] = True
+            page["last_edited_time"] = _now()
+            self._version += 1
+        return page
+
+    def upload(self, cloud, size):
+        self.uploaded_bytes += size
+        public_id = uuid.uuid4().hex
+        return {
+            "public_id": public_id,
+            "bytes": size,
+            "secure_url": f"{self.url}/{cloud}/image/upload/{public_id}",
+        }
+
+
+def _handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status, code, message, headers=None):
+            self._send(status, {"object": "error", "status": status, "code": code, "message": message}, headers)
+
+        def _dispatch(self, method):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            is_json = (self.headers.get("Content-Type") or "").startswith("application/json")
+            body = json.loads(raw) if raw and is_json else {}
+            fake.calls.append((method, url.path))
+            if fake._throttle():
+                return self._error(429, "rate_limited", "Rate limited", {"Retry-After": str(fake.retry_after)})
+            if fake.latency:
+                time.sleep(fake.latency)
+
+            if method == "POST" and parts[:2] == ["v1", "databases"] and parts[-1] == "query":
+                try:
+                    return self._send(200, fake.query(parts[2], body, parse_qs(url.query)))
+                except ValueError as e:
+                    return self._error(400, "validation_error", str(e))
+            if method == "POST" and parts == ["v1", "pages"]:
+                page, failed = fake.create(body)
+                if failed:
+                    return self._error(502, "bad_gateway", "Bad gateway")
+                return self._send(200, page)
+            if method == "POST" and parts[:1] == ["v1_1"] and parts[-1] == "upload":
+                return self._send(200, fake.upload(parts[1], length))
+            if method == "PATCH" and parts[:2] == ["v1", "pages"] and len(parts) == 3:
+                page = fake.update(parts[2], body)
+                if page is None:
+                    return self._error(404, "object_not_found", "Page not found")
+                return self._send(200, page)
+            return self._error(400, "invalid_request_url", f"Unsupported {method} {url.path}")
+
+        def do_GET(self):
+            # Harness hook: total calls so far, read from another process.
+            if urlparse(self.path).path == "/_calls":
+                data = str(len(fake.calls)).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                return self.wfile.write(data)
+            self._error(400, "invalid_request_url", f"Unsupported GET {self.path}")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+    return Handler
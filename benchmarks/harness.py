@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_notion import FakeNotion
+
+# Offline benchmark of the three pages. A local fake Notion/Cloudinary is
+# seeded with synthetic pages; each page script is driven headlessly by
+# Streamlit's AppTest in a fresh subprocess, so peak RSS and caches are per
+# run. Results are printed as JSON for tracking regressions.
+#   python -m benchmarks.harness --sizes 1000 10000 100000 --latency 0.05 --rate-limit 3
+# With --sync-worker, sync_worker.py --once fills the mirror first and the
+# page runs with SYNC_WORKER=1 (expect zero Notion calls from the page).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    "budget": ("budget_app.py", "DATABASE_ID"),
+    "wolfie": ("pages/1_Wolfie.py", "DOG_DATABASE_ID"),
+    "tax": ("pages/2_Tax_Receipts.py", "TAX_DATABASE_ID"),
+}
+
+
+def _title(name, text):
+    return {name: {"type": "title", "title": [{"type": "text", "text": {"content": text}}]}}
+
+
+def _select(name, value):
+    return {name: {"type": "select", "select": {"name": value}}}
+
+
+def seed(fake, script, database_id, count, seed=0):
+    rng = random.Random(seed)
+    people = ["Leandro", "Jonas"]
+    for i in range(count):
+        date = f"20{rng.randint(22, 26)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        props = {"Date": {"type": "date", "date": {"start": date}}, **_select("Who", rng.choice(people))}
+        if script == "budget":
+            # Mostly history: only the last 5% belong to the current round.
+            props.update(_title("Item", f"Safeway: item {i}"))
+            props["Cost"] = {"type": "number", "number": round(rng.uniform(1, 200), 2)}
+            props["Archived"] = {"type": "checkbox", "checkbox": i < count * 0.95}
+        elif script == "wolfie":
+            props.update(_title("Note", f"Contribution {i}"))
+            props["Amount"] = {"type": "number", "number": round(rng.uniform(5, 100), 2)}
+        else:
+            props.update(_title("Description", f"Receipt {i}"))
+            props["Amount"] = {"type": "number", "number": round(rng.uniform(5, 500), 2)}
+            props.update(_select("Category", rng.choice(["Health", "Business", "School"])))
+            props.update(_select("Year", date[:4]))
+            props["Receipt"] = {"type": "url", "url": f"{fake.url}/receipts/{i}.jpg" if i % 2 else None}
+        fake.add_page(database_id, props)
+
+
+def _child(script, calls_url):
+    # Runs inside the subprocess: cold load, warm load in a new session, and
+    # a plain rerun of the warm session.
+    from urllib.request import urlopen
+    from streamlit.testing.v1 import AppTest
+
+    def calls():
+        return int(urlopen(calls_url).read())
+
+    result = {}
+    path = os.path.join(ROOT, SCRIPTS[script][0])
+    app = None  # The warm session, rerun by the last step.
+    for name in ("cold", "warm", "rerun"):
+        before = calls()
+        started = time.perf_counter()
+        if name == "rerun":
+            app.run()
+        else:
+            app = AppTest.from_file(path, default_timeout=900).run()
+        result[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+        result[f"{name}_notion_calls"] = calls() - before
+        if app.exception:
+            result["error"] = app.exception[0].message
+            break
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(result))
+
+
+def run(script, size, latency, rate_limit, sync_worker=False):
+    fake = FakeNotion(latency=latency, rate_limit=rate_limit).start()
+    database_id = f"bench-{script}"
+    seed(fake, script, database_id, size)
+    env = dict(
+        os.environ,
+        NOTION_TOKEN="bench",
+        NOTION_BASE_URL=fake.url,
+        CLOUDINARY_CLOUD_NAME="bench",
+        CLOUDINARY_API_KEY="bench",
+        CLOUDINARY_API_SECRET="bench",
+        CLOUDINARY_UPLOAD_PREFIX=fake.url,
+        MIRROR_PATH=os.path.join(tempfile.mkdtemp(), "mirror.db"),
+        **{SCRIPTS[script][1]: database_id},
+    )
+    worker_seconds = None
+    try:
+        if sync_worker:
+            env["SYNC_WORKER"] = "1"
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "sync_worker.py", "--once"], cwd=ROOT, env=env, capture_output=True, check=True)
+            worker_seconds = round(time.perf_counter() - started, 3)
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.harness", "--child", script, "--calls-url", f"{fake.url}/_calls"],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=False,
+        )
+    finally:
+        fake.stop()
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no output"}
+    result = json.loads(lines[-1])
+    if worker_seconds is not None:
+        result["sync_worker_seconds"] = worker_seconds
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--scripts", nargs="+", default=list(SCRIPTS), choices=list(SCRIPTS))
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake request")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests/s before the fake answers 429")
+    parser.add_argument("--sync-worker", action="store_true", help="sync with sync_worker.py; pages only read the mirror")
+    parser.add_argument("--child", choices=list(SCRIPTS), help=argparse.SUPPRESS)
+    parser.add_argument("--calls-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.calls_url)
+        return
+
+    report = {"latency": args.latency, "rate_limit": args.rate_limit, "sync_worker": args.sync_worker, "runs": []}
+    for size in args.sizes:
+        for script in args.scripts:
+            report["runs"].append({"script": script, "pages": size, **run(script, size, args.latency, args.rate_limit, args.sync_worker)})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
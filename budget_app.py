@@ -1,214 +1,260 @@
-import os
 import streamlit as st
-from notion_client import Client
-import pandas as pd
 from datetime import datetime
-
-# --- 1. SETUP & CONFIG ---
-NOTION_TOKEN = os.environ.get("NOTION_TOKEN") or st.secrets.get("NOTION_TOKEN")
-DATABASE_ID = os.environ.get("DATABASE_ID") or st.secrets.get("DATABASE_ID")
-notion = Client(auth=NOTION_TOKEN)
+from shared import bank_import, bulk, data, outbox, rounds, schema, settlement, trace, ui
+from shared.config import DATABASE_ID, IMPORT_RULES, PEOPLE, SPLIT_WEIGHTS
 
 # --- 2. UI STYLING ---
 st.set_page_config(page_title="Budget Tracker", page_icon="💰", layout="centered")
-st.markdown("""
-    <style>
-    [data-testid="stToolbar"], footer, header {visibility: hidden !important;}
-    [data-testid="stSidebar"] {display: none !important;}
-    [data-testid="collapsedControl"] {display: none !important;}
-    .main { background-color: #ffffff; }
-
-    html, body, [class*="st-"], .stSelectbox, .stTextInput, .stNumberInput, label, button, td, th, p {
-        font-size: 14px !important; 
-    }
-
-    [data-testid="stMetricLabel"],
-    [data-testid="stMetricLabel"] * {
-        font-size: 18px !important;
-    }
-
-    [data-testid="stMetricValue"],
-    [data-testid="stMetricValue"] * {
-        font-size: 16px !important;
-    }
-
-    .stButton > button {
-        width: 100%;
-        border-radius: 10px;
-        height: 3.2em;
-        background-color: #007AFF !important;
-        color: white !important;
-        font-weight: bold;
-        border: none !important;
-        transition: 0.2s;
-    }
-
-    .stButton > button:hover {
-        background-color: #0056b3 !important;
-    }
-
-    button[data-testid="stBaseButton-primary"],
-    button[data-testid="stBaseButton-primary"]:focus,
-    button[data-testid="stBaseButton-primary"]:active,
-    .st-emotion-cache-16rr57l {
-        background-color: #34C759 !important;
-        border-color: #34C759 !important;
-    }
-
-    button[data-testid="stBaseButton-primary"]:hover {
-        background-color: #28A745 !important;
-        border-color: #28A745 !important;
-    }
-
-    .nav-button {
-        background: #ffffff;
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 6px 12px;
-        font-size: 12px;
-        cursor: pointer;
-        transition: 0.2s;
-        color: #333333 !important;
-        text-decoration: none !important;
-    }
-
-    .nav-button:hover {
-        background: #f0f0f0 !important;
-    }
-
-    .nav-button:active {
-        background: #e0e0e0 !important;
-    }
-
-    a .nav-button, a:visited .nav-button, a:hover .nav-button {
-        color: #333333 !important;
-        text-decoration: none !important;
-    }
-
-    div[data-baseweb="select"] > div, 
-    div[data-baseweb="input"] > div {
-        background-color: #f8f9fb !important;
-        border: 1px solid #e0e0e0 !important;
-        border-radius: 8px !important;
-    }
-
-    table { width: 100%; }
-    </style>
-    """, unsafe_allow_html=True)
-
-st.title("💰 Budget Tracker")
-
-# --- NAVIGATION ---
-st.markdown(
-    '<div style="display:flex; gap:8px; margin-bottom:8px;">'
-    '<a href="/Wolfie" target="_self" style="text-decoration:none;">'
-    '<button class="nav-button">🐾 Wolfie\'s Fund</button>'
-    '</a>'
-    '<a href="/Tax_Receipts" target="_self" style="text-decoration:none;">'
-    '<button class="nav-button">🧾 Tax Receipts</button>'
-    '</a>'
-    '</div>',
-    unsafe_allow_html=True
-)
-
-st.write("")
+trace.begin("budget")
+with trace.span("header"):
+    ui.header("💰 Budget Tracker", "/")
+data.warm_up()
 
 # --- 3. SESSION STATE INIT ---
 if "form_key" not in st.session_state:
     st.session_state.form_key = 0
 
 # --- 4. INPUT SECTION ---
+# Fragments (here and on the other pages): typing in the form reruns only the
+# form, and dashboard widgets rerun only the dashboard. The whole page reruns
+# after a write or refresh.
 categories = ["Superstore", "Safeway", "Dollarama", "Walmart", "Others"]
 
-fk = st.session_state.form_key
-category = st.selectbox("Category", options=categories, index=None, placeholder="Select store", key=f"category_{fk}")
-details = st.text_input("Details (Optional)", placeholder="e.g. Groceries", key=f"details_{fk}")
-cost = st.number_input("Amount ($)", min_value=0.0, step=0.01, format="%.2f", value=None, placeholder="0.00", key=f"cost_{fk}")
-who = st.selectbox("Who paid?", ["Leandro", "Jonas"], index=None, placeholder="Select person", key=f"who_{fk}")
-expense_date = st.date_input("Date", value=None, key=f"date_{fk}")
 
-st.write("")
+@st.fragment
+def input_section():
+    fk = st.session_state.form_key
+    category = st.selectbox("Category", options=categories, index=None, placeholder="Select store", key=f"category_{fk}")
+    details = st.text_input("Details (Optional)", placeholder="e.g. Groceries", key=f"details_{fk}")
+    cost = st.number_input("Amount ($)", min_value=0.0, step=0.01, format="%.2f", value=None, placeholder="0.00", key=f"cost_{fk}")
+    who = st.selectbox("Who paid?", PEOPLE, index=None, placeholder="Select person", key=f"who_{fk}")
+    expense_date = st.date_input("Date", value=None, key=f"date_{fk}")
+
+    st.write("")
 
-add_clicked = st.button("Add Expense", type="primary", key="add_btn")
+    add_clicked = st.button("Add Expense", type="primary", key="add_btn")
 
-if add_clicked:
-    if category and who and cost and cost > 0:
-        final_item_name = f"{category}: {details}" if details else category
-        today = datetime.now().strftime("%Y-%m-%d")
-        notion.pages.create(
-            parent={"database_id": DATABASE_ID},
-            properties={
+    if add_clicked:
+        if category and who and cost and cost > 0:
+            final_item_name = f"{category}: {details}" if details else category
+            today = datetime.now().strftime("%Y-%m-%d")
+            properties = {
                 "Item": {"title": [{"text": {"content": final_item_name}}]},
                 "Cost": {"number": cost},
                 "Who": {"select": {"name": who}},
                 "Date": {"date": {"start": str(expense_date) if expense_date else today}},
                 "Archived": {"checkbox": False}
             }
+            if ui.ok_to_add(data.duplicates(DATABASE_ID, properties), properties, "Add Expense"):
+                data.submit(DATABASE_ID, properties)
+                st.success("Added!")
+                st.session_state.form_key += 1
+                st.rerun()
+        else:
+            st.error("Please fill out Category, Amount, and Who paid.")
+
+
+input_section()
+
+
+# Bank statement import: parse and preview the CSV, then queue the ticked rows
+# in the outbox in one go. Failed rows show up in the dashboard with Retry.
+@st.fragment
+def import_section():
+    if not st.toggle("📥 Import bank statement", key="import_toggle"):
+        return
+    upload = st.file_uploader("Bank or credit card CSV", type=["csv"], key="import_file")
+    if upload is None:
+        return
+    try:
+        rows = bank_import.parse(upload, bank_import.rules_for(categories, IMPORT_RULES))
+    except bank_import.ImportFormatError as e:
+        st.error(f"Could not read this CSV: {e}")
+        return
+    if not rows:
+        st.info("No transactions found in this file.")
+        return
+
+    result = st.session_state.get("import_result")
+    imported = result[2] if result and result[0] == upload.file_id else ()
+    # Who paid is part of the duplicate key, so it is asked first: rows that
+    # match an entry already in the budget (a statement imported twice, or
+    # expenses also added by hand) then start unticked.
+    who = st.selectbox("Who paid?", PEOPLE, index=None, placeholder="Select person", key="import_who")
+    duplicates = (
+        [count > 0 for count in data.duplicate_counts(DATABASE_ID, [bank_import.properties(r, who) for r in rows])]
+        if who else ()
+    )
+    edited = st.data_editor(
+        bank_import.preview(rows, imported, duplicates),
+        column_config={
+            "Import": st.column_config.CheckboxColumn("Import"),
+            "Category": st.column_config.SelectboxColumn("Category", options=categories, required=True),
+            "Cost": st.column_config.NumberColumn("Cost", format="$%.2f", min_value=0.0),
+            "Duplicate": st.column_config.CheckboxColumn(
+                "Already in budget?", help="Same date, amount, store and person as an existing entry"
+            ),
+        },
+        disabled=["Date", "Merchant", "Duplicate"],
+        hide_index=True,
+        key=f"import_editor_{upload.file_id}_{len(imported)}_{who}",
+    )
+    show_import_result(upload.file_id)
+    chosen = edited[edited["Import"]].to_dict("records")
+    if not st.button(f"Import {len(chosen)} expense(s)", key="import_btn", disabled=not chosen):
+        return
+    if not who:
+        st.error("Please choose who paid.")
+        return
+
+    properties_list = [bank_import.properties(row, who) for row in chosen]
+    # Ticked rows are checked again as edited (category, cost); like the
+    # single-entry form, a second click imports them anyway.
+    flagged = sum(count > 0 for count in data.duplicate_counts(DATABASE_ID, properties_list))
+    if flagged and st.session_state.get("_import_duplicate_warned") != properties_list:
+        st.session_state._import_duplicate_warned = properties_list
+        st.warning(
+            f"⚠️ {flagged} ticked row(s) have the same date, amount, store and person as an entry already "
+            f"in the budget. Click **Import {len(chosen)} expense(s)** again to import them anyway."
         )
-        st.success("Added!")
-        st.session_state.form_key += 1
-        st.rerun()
-    else:
-        st.error("Please fill out Category, Amount, and Who paid.")
-
-# --- 5. DATA FETCHING ---
-try:
-    results = []
-    response = notion.databases.query(database_id=DATABASE_ID)
-    results.extend(response.get("results", []))
-    while response.get("has_more"):
-        response = notion.databases.query(
-            database_id=DATABASE_ID,
-            start_cursor=response.get("next_cursor")
-        )
-        results.extend(response.get("results", []))
-    rows = []
-    for page in results:
-        p = page["properties"]
-        if not p.get("Archived", {}).get("checkbox", False):
-            title_list = p.get("Item", {}).get("title", [])
-            item_val = title_list[0]["text"]["content"] if title_list else "Untitled"
-            date_val = p.get("Date", {}).get("date", {})
-            date_str = date_val.get("start", "No Date") if date_val else "No Date"
-            rows.append({
-                "id": page["id"],
-                "Date": date_str,
-                "Item": item_val,
-                "Cost": p.get("Cost", {}).get("number") or 0.0,
-                "Who": p.get("Who", {}).get("select", {}).get("name", "Unknown")
-            })
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        st.divider()
-        total = df["Cost"].sum()
-        st.metric("**Total**", f"${total:,.2f}")
-        l_spent = df[df["Who"] == "Leandro"]["Cost"].sum()
-        j_spent = df[df["Who"] == "Jonas"]["Cost"].sum()
-        l_owes = max(0.0, (j_spent - l_spent) / 2)
-        j_owes = max(0.0, (l_spent - j_spent) / 2)
-        col1, col2 = st.columns(2)
-        col1.write(f"💳 **Leandro owes:** `${l_owes:,.2f}`")
-        col2.write(f"💳 **Jonas owes:** `${j_owes:,.2f}`")
-        st.subheader("Current Expenses")
-        df_disp = df.copy()
-        df_disp.index = range(1, len(df_disp) + 1)
-        df_disp["Cost"] = df_disp["Cost"].map("${:,.2f}".format)
-        st.table(df_disp[["Date", "Item", "Cost", "Who"]])
-        st.divider()
-        if st.button("Clear & Start New Round", key="clear_btn"):
-            today = datetime.now().strftime("%Y-%m-%d")
-            notion.pages.create(
-                parent={"database_id": DATABASE_ID},
-                properties={
-                    "Item": {"title": [{"text": {"content": f"--- New Round Started: {today} ---"}}]},
+        return
+    st.session_state.pop("_import_duplicate_warned", None)
+    data.submit_many(DATABASE_ID, properties_list)
+    # Kept in session state so a rerun neither loses the message nor ticks
+    # the same rows again.
+    st.session_state.import_result = (
+        upload.file_id, len(chosen), list(imported) + [bank_import.row_key(row) for row in chosen]
+    )
+    st.rerun()
+
+
+def show_import_result(file_id):
+    result = st.session_state.get("import_result")
+    if result and result[0] == file_id:
+        st.success(f"Queued {result[1]} expense(s). They appear below now and sync to Notion in the background.")
+
+
+import_section()
+
+# --- 5. DATA & DASHBOARD ---
+@st.fragment
+def dashboard():
+    try:
+        if st.button("🔄 Refresh", key="refresh_btn"):
+            data.refresh(DATABASE_ID)
+        df = data.frame(DATABASE_ID, schema.BUDGET, properties=schema.BUDGET_PROPERTIES, archived_property="Archived")
+        outbox.render_status(DATABASE_ID)
+        if not df.empty:
+            st.divider()
+            with trace.span("aggregate"):
+                total = df["Cost"].sum()
+                spent = settlement.totals(df, "Cost")
+                owed = settlement.transfers(settlement.balances(spent, SPLIT_WEIGHTS))
+                unsplit = settlement.unsplit(spent, SPLIT_WEIGHTS)
+            st.metric("**Total**", schema.dollars(total))
+            for debtor, creditor, cents in owed:
+                st.write(f"💳 **{debtor} owes {creditor}:** `{schema.dollars(cents)}`")
+            if not owed:
+                st.write("💳 **All settled up**")
+            for payer, cents in unsplit.items():
+                st.warning(f"⚠️ {schema.dollars(cents)} paid by **{payer}** is not split: "
+                           f"set who paid on those expenses, or add {payer} to SPLIT_WEIGHTS.")
+            st.subheader("Current Expenses")
+            query = st.text_input("🔍 Search", placeholder="e.g. walmart march", key="search_box")
+            shown = df.iloc[data.matches(DATABASE_ID, schema.BUDGET, df, query)] if query.strip() else df
+            if query.strip():
+                st.caption(f"{len(shown)} of {len(df)} expenses match")
+            with trace.span("render"):
+                df_disp = shown.copy()
+                df_disp.index = range(1, len(df_disp) + 1)
+                df_disp["Cost"] = df_disp["Cost"].map(schema.dollars)
+                st.table(df_disp[["Date", "Item", "Cost", "Who"]])
+            st.divider()
+            left = bulk.pending(DATABASE_ID)
+            clearing = rounds.clear_requested(DATABASE_ID)
+            if data.worker_active() and (clearing or left):
+                st.info(f"⏳ Clearing the round in the background ({len(left)} expense(s) still to archive)." if left
+                        else "⏳ Clearing the round in the background...")
+            elif left:
+                st.warning(f"The last clear stopped with {len(left)} expense(s) still to archive. Click below to finish it.")
+            elif clearing:
+                st.warning("The last clear did not finish. Click below to finish it.")
+            if st.button("Clear & Start New Round", key="clear_btn"):
+                today = datetime.now().strftime("%Y-%m-%d")
+                expense_date = st.session_state.get(f"date_{st.session_state.form_key}")
+                marker = {
+                    "Item": {"title": [{"text": {"content": rounds.marker_title(today)}}]},
                     "Cost": {"number": 0.0},
-                    "Who": {"select": {"name": "Leandro"}},
+                    "Who": {"select": {"name": PEOPLE[0]}},
                     "Date": {"date": {"start": str(expense_date) if expense_date else today}},
                     "Archived": {"checkbox": True}
                 }
-            )
-            for page_id in df["id"]:
-                notion.pages.update(page_id=page_id, properties={"Archived": {"checkbox": True}})
-            st.rerun()
-except Exception as e:
-    st.error(f"Error: {e}")
+                # Stays empty when the sync worker takes the job.
+                progress = st.empty()
+                result = data.clear_round(
+                    DATABASE_ID, today, marker, SPLIT_WEIGHTS,
+                    on_progress=lambda n, total: progress.progress(n / total, text=f"Archived {n} of {total}")
+                )
+                failed = result[1] if result else []
+                if failed:
+                    st.error(f"{len(failed)} expense(s) could not be archived: {failed[0][1]}. Click again to retry.")
+                else:
+                    st.rerun()
+    except Exception as e:
+        st.error(f"Error: {e}")
+
+
+dashboard()
+
+
+# --- 6. ROUND HISTORY ---
+# Served from the snapshots taken at each clear; archived pages are only read
+# once, to backfill rounds cleared before snapshots existed.
+@st.fragment
+def round_history():
+    if not st.toggle("📜 Show past rounds", key="history_toggle"):
+        return
+    try:
+        if not rounds.backfilled(DATABASE_ID):
+            if data.worker_active():
+                st.info("⏳ The sync worker is importing past rounds from Notion...")
+            else:
+                with st.spinner("Importing past rounds from Notion..."):
+                    rounds.backfill(data.get_client(), DATABASE_ID, SPLIT_WEIGHTS)
+        past = rounds.history(DATABASE_ID)
+        if not past:
+            st.info("No past rounds yet.")
+            return
+
+        st.subheader("Past Rounds")
+        table = [
+            {
+                "Cleared": snap["cleared_at"],
+                "From": snap["first_date"] or "—",
+                "To": snap["last_date"] or "—",
+                "Items": snap["items"],
+                "Total": schema.dollars(snap["total"]),
+                **{person: schema.dollars(snap["spent"].get(person, 0)) for person in PEOPLE},
+                "Settlement": ", ".join(f"{d} → {c} {schema.dollars(cents)}" for d, c, cents in snap["transfers"]) or "Settled",
+                "Not split": ", ".join(f"{p} {schema.dollars(cents)}" for p, cents in snap.get("unsplit", {}).items()) or "—",
+            }
+            for snap in reversed(past)
+        ]
+        st.table(table)
+
+        trend = rounds.monthly(past)
+        if len(trend):
+            st.subheader("Monthly Spending")
+            st.bar_chart(trend.assign(Total=trend["Total"] / 100), x="Month", y="Total")
+            trend_disp = trend.copy()
+            trend_disp["Total"] = trend_disp["Total"].map(schema.dollars)
+            trend_disp["Change"] = trend_disp["Change"].map(lambda c: "—" if c != c else f"{c:+.0%}")
+            st.table(trend_disp.set_index("Month").iloc[::-1])
+    except Exception as e:
+        st.error(f"Error: {e}")
+
+
+round_history()
+ui.duplicates_section(DATABASE_ID, schema.BUDGET, ["Date", "Item", "Cost", "Who"])
+data.watch(DATABASE_ID)
+trace.finish()
@@ -0,0 +1,142 @@
+import csv
+import io
+import re
+from datetime import datetime
+
+# Bank / credit-card CSV import for the budget. Rows are read as a stream,
+# columns are found by common header names and merchants are mapped to store
+# categories by substring rules. The chosen rows go through the outbox, whose
+# worker creates them with the bounded, rate-limited bulk pipeline.
+
+DATE_COLUMNS = ["date", "transaction date", "trans. date", "posted date", "posting date"]
+MERCHANT_COLUMNS = ["description", "merchant", "payee", "name", "details", "transaction description"]
+AMOUNT_COLUMNS = ["amount", "transaction amount", "cad$", "usd$"]
+DEBIT_COLUMNS = ["debit", "withdrawal", "withdrawals", "charge"]
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y/%m/%d", "%b %d, %Y", "%d %b %Y"]
+FALLBACK_CATEGORY = "Others"
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def _normalize(text):
+    # "Wal-Mart #1234" and "walmart" should match.
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def rules_for(categories, configured=None):
+    # Configured rules first, then each store name matches itself.
+    rules = [(category, pattern) for category, patterns in (configured or {}).items() for pattern in patterns]
+    rules += [(category, category) for category in categories if category != FALLBACK_CATEGORY]
+    return [(category, _normalize(pattern)) for category, pattern in rules]
+
+
+def categorize(merchant, rules):
+    text = _normalize(merchant)
+    for category, pattern in rules:
+        if pattern and pattern in text:
+            return category
+    return FALLBACK_CATEGORY
+
+
+def _column(header, names):
+    lowered = {h.strip().lower(): h for h in header}
+    return next((lowered[n] for n in names if n in lowered), None)
+
+
+def _date(value):
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _number(value):
+    text = re.sub(r"[^0-9.\-()]", "", value or "")
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse(stream, rules, encoding="utf-8-sig"):
+    # [{"Date", "Merchant", "Category", "Cost", "Expense"}], one per data row.
+    # A single Amount column may hold charges as negative or positive numbers;
+    # whichever sign is more common counts as spending, and the other sign
+    # (refunds, payments) comes back with Expense=False.
+    # A file that is not CSV text (a PDF, an Excel export, a stray NUL byte)
+    # is reported like a missing column, not raised as a csv/codec error.
+    try:
+        if isinstance(stream, io.TextIOBase):
+            return _parse(stream, rules)
+        # Rewind (Streamlit keeps the same upload across reruns) and detach, so
+        # the wrapper does not close the caller's file.
+        stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+        try:
+            return _parse(text, rules)
+        finally:
+            text.detach()
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"Not {encoding} text ({e.reason} at byte {e.start}).") from e
+    except csv.Error as e:
+        raise ImportFormatError(f"Malformed CSV: {e}") from e
+
+
+def _parse(text, rules):
+    reader = csv.DictReader(text)
+    header = reader.fieldnames or []
+    date_col, merchant_col = _column(header, DATE_COLUMNS), _column(header, MERCHANT_COLUMNS)
+    debit_col, amount_col = _column(header, DEBIT_COLUMNS), _column(header, AMOUNT_COLUMNS)
+    if not date_col or not merchant_col or not (debit_col or amount_col):
+        raise ImportFormatError(f"Could not find date, description and amount columns in: {', '.join(header)}")
+
+    rows = []
+    for record in reader:
+        date = _date(record.get(date_col) or "")
+        amount = _number(record.get(debit_col) if debit_col else record.get(amount_col))
+        if date is None or not amount:
+            continue
+        merchant = " ".join((record.get(merchant_col) or "").split())
+        rows.append({"Date": date, "Merchant": merchant, "Category": categorize(merchant, rules),
+                     "Cost": round(abs(amount), 2), "_sign": amount < 0})
+    negative = sum(r["_sign"] for r in rows)
+    spending_is_negative = not debit_col and negative > len(rows) - negative
+    for row in rows:
+        row["Expense"] = row.pop("_sign") == spending_is_negative
+    return rows
+
+
+def row_key(row):
+    return (row["Date"], row["Merchant"], row["Cost"])
+
+
+def preview(rows, imported=(), duplicates=()):
+    # Editable table for the preview. "Import" starts ticked for spending rows
+    # that were not imported already and, per `duplicates` (one flag per row),
+    # do not look like an entry the budget already has.
+    import pandas as pd
+
+    done = set(imported)
+    duplicates = list(duplicates) or [False] * len(rows)
+    df = pd.DataFrame(rows, columns=["Date", "Merchant", "Category", "Cost"])
+    df.insert(0, "Import", [r["Expense"] and row_key(r) not in done and not dup for r, dup in zip(rows, duplicates)])
+    df["Duplicate"] = duplicates
+    return df
+
+
+def properties(row, who):
+    # Same shape as the budget form's entries.
+    return {
+        "Item": {"title": [{"text": {"content": f"{row['Category']}: {row['Merchant']}" if row["Merchant"] else row["Category"]}}]},
+        "Cost": {"number": row["Cost"]},
+        "Who": {"select": {"name": who}},
+        "Date": {"date": {"start": row["Date"]}},
+        "Archived": {"checkbox": False},
+    }
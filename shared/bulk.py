@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from shared import mirror
+
+_PENDING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_pending (
+    database_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    PRIMARY KEY (database_id, page_id)
+)
+"""
+
+
+def run(fn, items, workers=4, on_result=None):
+    # Calls fn(item) for every item on a bounded worker pool. Pacing and
+    # retries are the transport's (shared/transport.py), so a create that
+    # failed with a 5xx is not sent again here. on_result(item, result, error)
+    # runs in the caller's thread so it may touch Streamlit elements.
+    done, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result, error = future.result(), None
+                done.append(item)
+            except Exception as e:
+                result, error = None, e
+                failed.append((item, e))
+            if on_result:
+                on_result(item, result, error)
+    return done, failed
+
+
+# --- Resumable round archiving ---
+# Page IDs still to archive live in the mirror, so a failed or interrupted
+# clear is finished by clicking again instead of starting over.
+def pending(database_id):
+    with mirror.connect() as conn:
+        conn.execute(_PENDING_SCHEMA)
+        rows = conn.execute("SELECT page_id FROM archive_pending WHERE database_id = ?", (database_id,)).fetchall()
+    return [r[0] for r in rows]
+
+
+def start(database_id, page_ids):
+    with mirror.connect() as conn:
+        conn.execute(_PENDING_SCHEMA)
+        conn.executemany(
+            "INSERT OR IGNORE INTO archive_pending (database_id, page_id) VALUES (?, ?)",
+            [(database_id, page_id) for page_id in page_ids],
+        )
+
+
+def archive_pending(notion, database_id, on_progress=None):
+    page_ids = pending(database_id)
+    total = len(page_ids)
+    finished = []
+
+    def archive(page_id):
+        return notion.pages.update(page_id=page_id, properties={"Archived": {"checkbox": True}})
+
+    def record(page_id, page, error):
+        # A page deleted in Notion meanwhile can never be archived; forget it,
+        # in the mirror too.
+        gone = getattr(error, "status", None) == 404
+        if error is None or gone:
+            with mirror.connect() as conn:
+                conn.execute(
+                    "DELETE FROM archive_pending WHERE database_id = ? AND page_id = ?", (database_id, page_id)
+                )
+        if gone:
+            mirror.forget(database_id, [page_id])
+        if page is not None:
+            mirror.upsert(database_id, page)
+        finished.append(page_id)
+        if on_progress:
+            on_progress(len(finished), total)
+
+    done, failed = run(archive, page_ids, on_result=record)
+    return done, [(page_id, e) for page_id, e in failed if getattr(e, "status", None) != 404]
@@ -0,0 +1,66 @@
+import threading
+import time
+
+# Process-wide cache shared by every Streamlit session. An entry is reused
+# while it is younger than its TTL and the mirror version it was built from is
+# still current. Concurrent misses for the same key wait for a single load
+# (single-flight) instead of each calling Notion.
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SharedCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.flights = {}
+
+    def get(self, key, load, ttl, version):
+        # load(sync) builds the value; sync=True when the TTL ran out and the
+        # source (Notion) must be consulted, False when only local data changed.
+        current = version()
+        with self.lock:
+            entry = self.entries.get(key)
+            expired = entry is None or time.monotonic() - entry["synced_at"] >= ttl
+            if entry is not None and not expired and entry["version"] == current:
+                return entry["value"]
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load(expired)
+            with self.lock:
+                # The version read before the load: a write that lands while it
+                # runs may be missing from the value, so it must still count
+                # as newer. A sync inside load() costs one more (local) reload.
+                self.entries[key] = {
+                    "value": flight.value,
+                    "version": current,
+                    "synced_at": time.monotonic() if expired else entry["synced_at"],
+                }
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, key):
+        # The next get() reloads from the source, whatever the TTL.
+        with self.lock:
+            self.entries.pop(key, None)
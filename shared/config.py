@@ -0,0 +1,103 @@
+import os
+from datetime import date
+
+import streamlit as st
+
+
+def setting(name):
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        return st.secrets.get(name)
+    except FileNotFoundError:
+        # No secrets.toml (e.g. on Render, where everything is in the environment).
+        return None
+
+
+NOTION_TOKEN = setting("NOTION_TOKEN")
+NOTION_BASE_URL = setting("NOTION_BASE_URL") or "https://api.notion.com"
+DATABASE_ID = setting("DATABASE_ID")
+DOG_DATABASE_ID = setting("DOG_DATABASE_ID")
+TAX_DATABASE_ID = setting("TAX_DATABASE_ID")
+
+
+def _weights(value):
+    # "Leandro:1,Jonas:1,Sam:0.5" in the environment, or a table in secrets.toml.
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = dict(part.split(":", 1) for part in value.split(",") if part.strip())
+    weights = {name.strip(): float(weight) for name, weight in value.items()}
+    if any(weight < 0 for weight in weights.values()) or not any(weights.values()):
+        raise ValueError(f"SPLIT_WEIGHTS needs non-negative weights, at least one above 0: {value}")
+    return weights
+
+
+# Who shares the budget and how the round is split between them.
+SPLIT_WEIGHTS = _weights(setting("SPLIT_WEIGHTS")) or {"Leandro": 1.0, "Jonas": 1.0}
+PEOPLE = list(SPLIT_WEIGHTS)
+
+
+def _rules(value):
+    # "Safeway:safeway|sobeys,Walmart:wal-mart|walmart" in the environment, or
+    # a table of category -> [patterns] in secrets.toml.
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = dict(part.split(":", 1) for part in value.split(",") if part.strip())
+    return {
+        category.strip(): [p.strip().lower() for p in (patterns.split("|") if isinstance(patterns, str) else patterns)]
+        for category, patterns in value.items()
+    }
+
+
+# Merchant substrings that map bank-statement rows to budget categories.
+IMPORT_RULES = _rules(setting("IMPORT_RULES"))
+
+
+def _goals(value):
+    # "Surgery:4951.92,Checkup:300@2026-11-01" in the environment, or a table
+    # in secrets.toml. A goal with a date only counts contributions from then.
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = dict(part.split(":", 1) for part in value.split(",") if part.strip())
+    goals = {}
+    for name, spec in value.items():
+        if hasattr(spec, "get"):
+            amount, since = spec.get("amount"), spec.get("since")
+        else:
+            amount, _, since = str(spec).partition("@")
+        amount, since = float(amount), str(since).strip() if since else None
+        if amount <= 0:
+            raise ValueError(f"WOLFIE_GOALS: the amount for {name.strip()} must be above 0, got {amount}")
+        if since:
+            try:
+                date.fromisoformat(since)
+            except ValueError:
+                raise ValueError(f"WOLFIE_GOALS: the start date for {name.strip()} must be YYYY-MM-DD, got {since}")
+        goals[name.strip()] = {"amount": amount, "since": since}
+    return goals
+
+
+def _people(value):
+    # "Leandro,Jonas" in the environment, or a list in secrets.toml.
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [name.strip() for name in value if name.strip()]
+
+
+# Who saves for Wolfie: the "Who saved?" choices and how each goal is split
+# (evenly). Independent of the budget's SPLIT_WEIGHTS.
+WOLFIE_PEOPLE = _people(setting("WOLFIE_PEOPLE")) or ["Leandro", "Jonas"]
+
+# Who tax receipts are filed for: the "Who?" choices on Tax Receipts. Totals
+# also list anyone else a receipt names.
+TAX_PEOPLE = _people(setting("TAX_PEOPLE")) or ["Leandro", "Jonas"]
+
+# Wolfie's Fund goals, all tracked against the same contributions and split
+# evenly between WOLFIE_PEOPLE.
+WOLFIE_GOALS = _goals(setting("WOLFIE_GOALS")) or {"Surgery": {"amount": 4951.92, "since": None}}
@@ -0,0 +1,256 @@
+import importlib.util
+import math
+import threading
+from itertools import chain
+from typing import TYPE_CHECKING, Optional
+
+import streamlit as st
+
+from shared import bulk, dedup, mirror, outbox, rollups, rounds, schema, search, trace
+from shared.cache import SharedCache
+from shared.config import DATABASE_ID, DOG_DATABASE_ID, NOTION_BASE_URL, NOTION_TOKEN, TAX_DATABASE_ID, setting
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from notion_client import Client
+
+# Single data-access layer for the three pages. The Notion client and its
+# connection pool live once per process, so reruns reuse warm connections
+# instead of paying a fresh TLS handshake each time. httpx, notion_client and
+# pandas are imported on first use so the header and forms paint first.
+
+KEEPALIVE_SECONDS = 120
+# Notion is synced at most this often per process unless refresh() is called
+# (SYNC_TTL=0: on every rerun, as before the TTL existed).
+SYNC_TTL = float(setting("SYNC_TTL") or 60)
+# How often each open page checks whether another session changed the data.
+WATCH_SECONDS = 5
+# WARMUP=1: the first page load also syncs every database in the background.
+WARMUP = (setting("WARMUP") or "").lower() in ("1", "true", "yes")
+# SYNC_WORKER=1: sync_worker.py keeps the mirror current and flushes the
+# outbox, so reruns only read the mirror and never call Notion themselves.
+SYNC_WORKER = (setting("SYNC_WORKER") or "").lower() in ("1", "true", "yes")
+# When the worker has not checked in for this long, this process syncs and
+# flushes on its own until it is back.
+WORKER_STALE_SECONDS = 30
+
+# What frame() is called with for each database, for the warm-up.
+FRAMES = {
+    DATABASE_ID: (schema.BUDGET, schema.BUDGET_PROPERTIES, "Archived"),
+    DOG_DATABASE_ID: (schema.WOLFIE, schema.WOLFIE_PROPERTIES, None),
+    TAX_DATABASE_ID: (schema.TAX, schema.TAX_PROPERTIES, None),
+}
+
+rollups.define(TAX_DATABASE_ID, *schema.TAX_ROLLUP)
+rollups.define(DOG_DATABASE_ID, *schema.WOLFIE_ROLLUP)
+dedup.define(DATABASE_ID, schema.BUDGET_DEDUP)
+dedup.define(DOG_DATABASE_ID, schema.WOLFIE_DEDUP)
+dedup.define(TAX_DATABASE_ID, schema.TAX_DEDUP)
+
+
+def new_client() -> "Client":
+    import httpx
+    from notion_client import Client
+
+    from shared.transport import NotionTransport
+
+    pool = httpx.HTTPTransport(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=KEEPALIVE_SECONDS),
+    )
+    http = httpx.Client(transport=NotionTransport(pool))
+    return Client(auth=NOTION_TOKEN, base_url=NOTION_BASE_URL, client=http)
+
+
+@st.cache_resource
+def get_client() -> "Client":
+    return new_client()
+
+
+def worker_active() -> bool:
+    # True while the sync worker owns the Notion traffic.
+    return SYNC_WORKER and mirror.worker_seen_within(WORKER_STALE_SECONDS)
+
+
+def _source() -> Optional["Client"]:
+    # None when the sync worker owns the Notion traffic; otherwise this
+    # process syncs itself, and also flushes writes left in the outbox.
+    if worker_active():
+        return None
+    _outbox_worker()
+    return get_client()
+
+
+@st.cache_resource
+def _outbox_worker() -> outbox.Worker:
+    return outbox.Worker(get_client(), paused=worker_active).start()
+
+
+@st.cache_resource
+def _frames() -> SharedCache:
+    return SharedCache()
+
+
+# Databases whose next sync is a full reconcile (Refresh was clicked).
+_reconcile = set()
+# database_id -> error of its last failed sync, shown as "may be stale".
+_sync_errors = {}
+
+
+def _load(frames, client, database_id, fields, properties, archived_property, ttl):
+    # Without a client the frame is rebuilt only when the mirror version moves.
+    if client is None:
+        ttl = math.inf
+
+    def load(sync):
+        if sync and client is not None:
+            full = database_id in _reconcile
+            _reconcile.discard(database_id)
+            try:
+                with trace.span("fetch"):
+                    mirror.sync(client, database_id, properties=properties,
+                                archived_property=archived_property, full=full)
+                _sync_errors.pop(database_id, None)
+            except Exception as e:
+                # Notion is down, throttling or the breaker is open: serve the
+                # mirror as it is. The entry still counts as synced, so the
+                # next attempt waits for the TTL instead of every rerun.
+                if full:
+                    _reconcile.add(database_id)
+                _sync_errors[database_id] = e
+        with trace.span("decode"):
+            return schema.decode(chain(mirror.iter_pages(database_id), outbox.pending_pages(database_id)), fields)
+
+    return frames.get(database_id, load, ttl, version=lambda: mirror.version(database_id))
+
+
+def frame(database_id: str, fields: list, properties: Optional[list] = None,
+          archived_property: Optional[str] = None, ttl: float = SYNC_TTL) -> "pd.DataFrame":
+    # Shared across sessions: callers must not modify the returned frame.
+    df = _load(_frames(), _source(), database_id, fields, properties, archived_property, ttl)
+    st.session_state[f"_seen_{database_id}"] = mirror.version(database_id)
+    error = _sync_errors.get(database_id)
+    if error is not None:
+        st.caption(f"⚠️ Could not reach Notion ({error}). Showing the last synced data, which may be stale.")
+    return df
+
+
+@st.cache_resource
+def _warm_up() -> threading.Thread:
+    # Opens the Notion connection and primes every frame while the first page
+    # is still painting. Concurrent frame() calls join these loads instead of
+    # repeating them.
+    frames, client = _frames(), _source()
+
+    def run():
+        for database_id, (fields, properties, archived_property) in FRAMES.items():
+            if database_id:
+                try:
+                    _load(frames, client, database_id, fields, properties, archived_property, SYNC_TTL)
+                except Exception:
+                    pass  # The page's own frame() call will surface it.
+
+    thread = threading.Thread(target=run, daemon=True, name="warm-up")
+    thread.start()
+    return thread
+
+
+def warm_up() -> None:
+    if WARMUP:
+        _warm_up()
+
+
+def rollup(database_id: str) -> "pd.DataFrame":
+    # Totals per group from the mirror's materialized rollup, plus queued writes.
+    # Call after frame() so the mirror is synced.
+    with mirror.connect() as conn:
+        return rollups.totals(conn, database_id, outbox.pending_pages(database_id))
+
+
+def duplicates(database_id: str, properties: dict) -> list:
+    # Mirrored or queued pages that look like the page `properties` would create.
+    with mirror.connect() as conn:
+        return dedup.matches(conn, database_id, properties, outbox.pending_pages(database_id))
+
+
+def duplicate_counts(database_id: str, properties_list: list) -> list:
+    # duplicates() for many pages at once, as counts, e.g. a statement import.
+    with mirror.connect() as conn:
+        return dedup.counts(conn, database_id, properties_list, outbox.pending_pages(database_id))
+
+
+def duplicates_report(database_id: str, fields: list) -> "pd.DataFrame":
+    # Every group of likely duplicates, one row per page, numbered by Group.
+    with mirror.connect() as conn:
+        return dedup.report(conn, database_id, fields, outbox.pending_pages(database_id))
+
+
+@st.cache_resource
+def _indexes() -> dict:
+    return {}
+
+
+def matches(database_id: str, fields: list, df: "pd.DataFrame", text: str) -> list:
+    # Positions of the rows of `df` matching every word of `text` as a prefix.
+    # Pass the frame() result itself (not a filtered copy): the index only
+    # diffs against a new frame after a sync or write.
+    indexes = _indexes()
+    index = indexes.get(database_id)
+    if index is None:
+        index = indexes.setdefault(database_id, search.SearchIndex(fields))
+    with trace.span("search"):
+        return index.search(df, text)
+
+
+def refresh(database_id: str) -> None:
+    # The next frame() reads every page from Notion, whatever the TTL, and
+    # drops pages deleted there (with the sync worker, the worker does this
+    # now and watch() reruns the page after).
+    if worker_active():
+        mirror.request_sync(database_id, full=True)
+    else:
+        _reconcile.add(database_id)
+    _frames().invalidate(database_id)
+
+
+@st.fragment(run_every=WATCH_SECONDS)
+def watch(database_id: str) -> None:
+    # Reruns this page when another session (or the outbox worker) changed the
+    # database. Only the local mirror version is checked; Notion is not called.
+    seen = st.session_state.get(f"_seen_{database_id}")
+    if seen is not None and seen != mirror.version(database_id):
+        st.rerun()
+
+
+def _wake() -> None:
+    # The sync worker polls the outbox itself.
+    if not worker_active():
+        _outbox_worker().wake()
+
+
+def submit(database_id: str, properties: dict, files: Optional[list] = None,
+           files_property: Optional[str] = None) -> str:
+    # Queues the page in the outbox and returns at once; the worker creates it.
+    key = outbox.enqueue(database_id, properties, files=files, files_property=files_property)
+    _wake()
+    return key
+
+
+def submit_many(database_id: str, properties_list: list) -> list:
+    # Queues all pages at once; the worker creates them at Notion's rate limit.
+    keys = outbox.enqueue_many(database_id, properties_list)
+    _wake()
+    return keys
+
+
+def clear_round(database_id: str, cleared_at: str, marker: dict, weights: dict,
+                on_progress=None) -> Optional[tuple]:
+    # Closes the budget round (see rounds.run_clear). With the sync worker the
+    # job is only queued and None is returned; otherwise it runs here and
+    # returns (done, failed) for the archiving. A clear that stopped halfway
+    # is finished rather than started again.
+    if not bulk.pending(database_id):
+        rounds.request_clear(database_id, cleared_at, marker)
+    if worker_active():
+        return None
+    return rounds.run_clear(get_client(), database_id, weights, on_progress)
@@ -0,0 +1,141 @@
+import json
+import re
+
+from shared import schema
+
+# Likely-duplicate detection. Each mirrored page of a database with a spec
+# gets a key from its normalized date, amount in cents, store/description and
+# person. mirror.write_pages() keeps the keys current (like the rollups), so
+# checking a new entry is one indexed lookup and the duplicates report is one
+# GROUP BY instead of a scan over every pair of pages.
+
+# database_id -> [date, amount, text, person] fields
+SPECS = {}
+
+
+def define(database_id, fields):
+    if database_id:
+        SPECS[database_id] = fields
+
+
+def _signature(spec):
+    return json.dumps([list(f) for f in spec])
+
+
+def _text(value):
+    # "Safeway: groceries" and "safeway" are the same store.
+    return re.sub(r"[^a-z0-9]", "", str(value).split(":", 1)[0].lower())
+
+
+def _keyer(spec):
+    parts = []
+    for field in spec:
+        extract = schema.extractor(field)
+        if field.kind == "money":
+            parts.append(lambda page, extract=extract: str(round(extract(page) * 100)))
+        elif field.kind == "title":
+            parts.append(lambda page, extract=extract: _text(extract(page)))
+        else:
+            parts.append(lambda page, extract=extract: str(extract(page)).strip().lower())
+    return lambda page: "|".join(part(page) for part in parts)
+
+
+def apply(conn, database_id, pages, live):
+    # pages: every page being written; live: those that stay in the mirror.
+    spec = SPECS.get(database_id)
+    if not spec:
+        return
+    keyer = _keyer(spec)
+    conn.executemany("DELETE FROM dedup_keys WHERE page_id = ?", [(p["id"],) for p in pages])
+    conn.executemany(
+        "INSERT INTO dedup_keys (database_id, key, page_id) VALUES (?, ?, ?)",
+        [(database_id, keyer(p), p["id"]) for p in live],
+    )
+
+
+def _rebuild(conn, database_id, spec):
+    conn.execute("DELETE FROM dedup_keys WHERE database_id = ?", (database_id,))
+    rows = conn.execute("SELECT page FROM pages WHERE database_id = ?", (database_id,))
+    keyer = _keyer(spec)
+    conn.executemany(
+        "INSERT INTO dedup_keys (database_id, key, page_id) VALUES (?, ?, ?)",
+        [(database_id, keyer(page), page["id"]) for page in (json.loads(r[0]) for r in rows)],
+    )
+    conn.execute(
+        "INSERT INTO dedup_specs (database_id, spec) VALUES (?, ?) "
+        "ON CONFLICT(database_id) DO UPDATE SET spec = excluded.spec",
+        (database_id, _signature(spec)),
+    )
+
+
+def _current(conn, database_id):
+    spec = SPECS[database_id]
+    stored = conn.execute("SELECT spec FROM dedup_specs WHERE database_id = ?", (database_id,)).fetchone()
+    if stored is None or stored[0] != _signature(spec):
+        _rebuild(conn, database_id, spec)
+    return spec
+
+
+def matches(conn, database_id, properties, extra_pages=()):
+    # Mirrored pages, and extra_pages (e.g. queued outbox writes), with the
+    # same key as a page about to be created from `properties`.
+    keyer = _keyer(_current(conn, database_id))
+    wanted = keyer({"properties": properties})
+    rows = conn.execute(
+        "SELECT p.page FROM dedup_keys k JOIN pages p ON p.page_id = k.page_id "
+        "WHERE k.database_id = ? AND k.key = ?",
+        (database_id, wanted),
+    )
+    return [json.loads(r[0]) for r in rows] + [p for p in extra_pages if keyer(p) == wanted]
+
+
+def counts(conn, database_id, properties_list, extra_pages=()):
+    # For each page about to be created, how many mirrored or extra pages
+    # share its key; one indexed lookup per distinct key.
+    keyer = _keyer(_current(conn, database_id))
+    extra = {}
+    for page in extra_pages:
+        extra[keyer(page)] = extra.get(keyer(page), 0) + 1
+    found = {}
+    for properties in properties_list:
+        wanted = keyer({"properties": properties})
+        if wanted not in found:
+            found[wanted] = conn.execute(
+                "SELECT COUNT(*) FROM dedup_keys WHERE database_id = ? AND key = ?", (database_id, wanted)
+            ).fetchone()[0] + extra.get(wanted, 0)
+    return [found[keyer({"properties": properties})] for properties in properties_list]
+
+
+def groups(conn, database_id, extra_pages=()):
+    # [[page, page, ...]] for every key shared by more than one page.
+    keyer = _keyer(_current(conn, database_id))
+    extra = {}
+    for page in extra_pages:
+        extra.setdefault(keyer(page), []).append(page)
+    counts = dict(conn.execute(
+        "SELECT key, COUNT(*) FROM dedup_keys WHERE database_id = ? GROUP BY key", (database_id,)
+    ))
+    found = {k: [] for k in set(counts) | set(extra) if counts.get(k, 0) + len(extra.get(k, ())) > 1}
+    if found:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_keys (key TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM wanted_keys")
+        conn.executemany("INSERT INTO wanted_keys (key) VALUES (?)", [(k,) for k in found])
+        rows = conn.execute(
+            "SELECT k.key, p.page FROM wanted_keys w JOIN dedup_keys k ON k.database_id = ? AND k.key = w.key "
+            "JOIN pages p ON p.page_id = k.page_id",
+            (database_id,),
+        )
+        for k, page in rows:
+            found[k].append(json.loads(page))
+    return [found[k] + extra.get(k, []) for k in sorted(found)]
+
+
+def report(conn, database_id, fields, extra_pages=()):
+    # Duplicate groups as one frame (decoded with `fields`) plus a Group column.
+    pages, numbers = [], []
+    for number, group in enumerate(groups(conn, database_id, extra_pages), 1):
+        pages.extend(group)
+        numbers.extend([number] * len(group))
+    df = schema.decode(pages, fields)
+    df.insert(0, "Group", numbers)
+    return df
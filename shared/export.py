@@ -0,0 +1,131 @@
+import csv
+import importlib.util
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+# ZIP export of tax receipts: a ledger (CSV, plus Parquet when pyarrow is
+# installed) and every receipt file. Files are downloaded by a bounded pool
+# and copied into the archive as each one finishes, so at most a few files
+# are held at once (in memory up to SPOOL_BYTES each, on disk beyond that).
+
+FETCH_WORKERS = 8
+SPOOL_BYTES = 1 << 20
+CHUNK_BYTES = 64 * 1024
+
+LEDGER_COLUMNS = ["Date", "Description", "Amount", "Category", "Who", "Year"]
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-")[:40] or "receipt"
+
+
+def _jobs(df):
+    # [(row position, archive name, url)] for every " | "-separated URL.
+    jobs = []
+    for pos, (date, description, urls) in enumerate(zip(df["Date"], df["Description"], df["Receipt URL"])):
+        for i, url in enumerate(u for u in str(urls).split(" | ") if u):
+            ext = os.path.splitext(urlparse(url).path)[1].lower() or ".jpg"
+            jobs.append((pos, f"receipts/{date}_{pos + 1:04d}_{_slug(description)}_{i + 1}{ext}", url))
+    return jobs
+
+
+def http_fetcher(workers=FETCH_WORKERS):
+    import httpx
+
+    client = httpx.Client(
+        follow_redirects=True,
+        timeout=30,
+        limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+    )
+
+    def fetch(url):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        try:
+            with client.stream("GET", url) as response:
+                response.raise_for_status()
+                for chunk in response.iter_bytes(CHUNK_BYTES):
+                    body.write(chunk)
+        except Exception:
+            body.close()
+            raise
+        body.seek(0)
+        return body
+
+    fetch.close = client.close
+    return fetch
+
+
+def write_zip(df, out, fetch=None, workers=FETCH_WORKERS, on_progress=None):
+    # df: receipt rows as decoded by schema.TAX (Amount in cents). fetch(url)
+    # returns a readable file. Returns {archive name: error} for files that
+    # could not be fetched; they are listed in missing.txt instead.
+    own_fetch = fetch is None
+    fetch = fetch or http_fetcher(workers)
+    jobs = _jobs(df)
+    files = [[] for _ in range(len(df))]
+    failed = {}
+    try:
+        with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                queue = iter(jobs)
+                running = {}
+
+                def submit():
+                    job = next(queue, None)
+                    if job is not None:
+                        running[pool.submit(fetch, job[2])] = job
+
+                # Two downloads per worker in flight: enough to keep the pool
+                # busy without holding many finished files.
+                for _ in range(workers * 2):
+                    submit()
+                done_count = 0
+                while running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        pos, name, url = running.pop(future)
+                        try:
+                            with future.result() as body, zf.open(zipfile.ZipInfo(name), "w") as dst:
+                                shutil.copyfileobj(body, dst, CHUNK_BYTES)
+                            files[pos].append(name)
+                        except Exception as e:
+                            failed[name] = f"{url}: {e}"
+                        done_count += 1
+                        if on_progress:
+                            on_progress(done_count, len(jobs))
+                        submit()
+
+            ledger = df[LEDGER_COLUMNS].assign(
+                Amount=df["Amount"] / 100,
+                Files=[" | ".join(names) for names in files],
+            )
+            text = io.StringIO()
+            ledger.to_csv(text, index=False, quoting=csv.QUOTE_MINIMAL)
+            zf.writestr("ledger.csv", text.getvalue())
+            if importlib.util.find_spec("pyarrow") is not None:
+                zf.writestr("ledger.parquet", ledger.astype({"Category": str, "Who": str, "Year": str}).to_parquet(index=False))
+            if failed:
+                zf.writestr("missing.txt", "".join(f"{name}\t{error}\n" for name, error in sorted(failed.items())))
+    finally:
+        if own_fetch:
+            fetch.close()
+    return failed
+
+
+def zip_file(df, **options):
+    # The archive as bytes for st.download_button, which only accepts bytes,
+    # str or a few in-memory file types and keeps the result in its
+    # in-memory media store anyway. The archive is built on disk, but the
+    # whole ZIP is then held in memory once: roughly the size of every
+    # receipt file exported (they are already compressed). Export one year
+    # at a time when that is too much for the host.
+    with tempfile.TemporaryFile() as out:
+        write_zip(df, out, **options)
+        out.seek(0)
+        return out.read()
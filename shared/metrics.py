@@ -0,0 +1,33 @@
+import threading
+
+# Per-key latency histograms (Notion endpoints, rerun stages). Buckets are
+# upper bounds in seconds; counts are per bucket, not cumulative.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class Metrics:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, endpoint, seconds, status):
+        with self.lock:
+            e = self.endpoints.setdefault(
+                endpoint, {"count": 0, "sum": 0.0, "buckets": [0] * len(self.buckets), "statuses": {}}
+            )
+            e["count"] += 1
+            e["sum"] += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    e["buckets"][i] += 1
+                    break
+            e["statuses"][status] = e["statuses"].get(status, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                k: {**v, "buckets": list(v["buckets"]), "statuses": dict(v["statuses"])}
+                for k, v in self.endpoints.items()
+            }
@@ -0,0 +1,292 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from shared import dedup, rollups
+from shared.paginate import iter_batches
+from shared.queries import build_query
+
+# Local SQLite mirror of the Notion databases. Each rerun only asks Notion for
+# pages edited since the last sync cursor and reads everything else from disk.
+MIRROR_PATH = os.environ.get("MIRROR_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "mirror.db"
+)
+
+# Bump when the tables change; the mirror is a cache, so it is simply rebuilt.
+_SCHEMA_VERSION = 7
+
+_SCHEMA = """
+DROP TABLE IF EXISTS pages;
+DROP TABLE IF EXISTS sync_state;
+DROP TABLE IF EXISTS rollups;
+DROP TABLE IF EXISTS rollup_specs;
+DROP TABLE IF EXISTS sync_requests;
+DROP TABLE IF EXISTS dedup_keys;
+DROP TABLE IF EXISTS dedup_specs;
+CREATE TABLE pages (
+    page_id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL,
+    date TEXT,
+    page TEXT NOT NULL
+);
+CREATE INDEX pages_by_database ON pages (database_id, date);
+CREATE TABLE sync_state (
+    database_id TEXT PRIMARY KEY,
+    cursor TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE rollups (
+    database_id TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    cents INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (database_id, grp)
+);
+CREATE TABLE rollup_specs (
+    database_id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL
+);
+CREATE TABLE dedup_keys (
+    page_id TEXT PRIMARY KEY,
+    database_id TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE INDEX dedup_by_key ON dedup_keys (database_id, key);
+CREATE TABLE dedup_specs (
+    database_id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL
+);
+CREATE TABLE sync_requests (
+    database_id TEXT PRIMARY KEY,
+    requested_at REAL NOT NULL,
+    full INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_initialized = set()
+
+
+@contextmanager
+def connect():
+    if MIRROR_PATH not in _initialized:
+        os.makedirs(os.path.dirname(MIRROR_PATH), exist_ok=True)
+    conn = sqlite3.connect(MIRROR_PATH, timeout=30)
+    try:
+        if MIRROR_PATH not in _initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            _initialized.add(MIRROR_PATH)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _slim(page):
+    # Keep only what the pages read, so the mirror stays small.
+    return {
+        "id": page["id"],
+        "created_time": page.get("created_time"),
+        "last_edited_time": page.get("last_edited_time"),
+        "properties": page.get("properties", {}),
+    }
+
+
+def _is_archived(page):
+    return bool(page.get("properties", {}).get("Archived", {}).get("checkbox", False))
+
+
+def _date(page):
+    date_val = page.get("properties", {}).get("Date", {}).get("date") or {}
+    return date_val.get("start")
+
+
+def touch(conn, database_id):
+    # Bumps the database's version; anything derived from its rows is stale.
+    conn.execute(
+        "INSERT INTO sync_state (database_id, version) VALUES (?, 1) "
+        "ON CONFLICT(database_id) DO UPDATE SET version = version + 1",
+        (database_id,),
+    )
+
+
+def version(database_id):
+    with connect() as conn:
+        row = conn.execute("SELECT version FROM sync_state WHERE database_id = ?", (database_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def _stored(conn, page_ids, chunk_size=500):
+    found = []
+    for i in range(0, len(page_ids), chunk_size):
+        chunk = page_ids[i:i + chunk_size]
+        rows = conn.execute(f"SELECT page FROM pages WHERE page_id IN ({','.join('?' * len(chunk))})", chunk)
+        found.extend(json.loads(r[0]) for r in rows)
+    return found
+
+
+def _stored_json(conn, page_ids, chunk_size=500):
+    # {page_id: stored page JSON} for the given pages that are mirrored.
+    found = {}
+    for i in range(0, len(page_ids), chunk_size):
+        chunk = page_ids[i:i + chunk_size]
+        found.update(conn.execute(
+            f"SELECT page_id, page FROM pages WHERE page_id IN ({','.join('?' * len(chunk))})", chunk))
+    return found
+
+
+def write_pages(conn, database_id, pages):
+    if not pages:
+        return
+    touch(conn, database_id)
+    # Archived rows are history: drop them rather than mirror them.
+    archived = [(p["id"],) for p in pages if _is_archived(p)]
+    live = [p for p in pages if not _is_archived(p)]
+    if database_id in rollups.SPECS:
+        rollups.apply(conn, database_id, _stored(conn, [p["id"] for p in pages]), live)
+    dedup.apply(conn, database_id, pages, live)
+    conn.executemany("DELETE FROM pages WHERE page_id = ?", archived)
+    conn.executemany(
+        "INSERT INTO pages (page_id, database_id, last_edited_time, date, page) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(page_id) DO UPDATE SET last_edited_time = excluded.last_edited_time, "
+        "date = excluded.date, page = excluded.page",
+        [(p["id"], database_id, p.get("last_edited_time") or "", _date(p), json.dumps(_slim(p))) for p in live],
+    )
+
+
+def _remove(conn, database_id, page_ids):
+    # Pages gone from Notion (deleted, trashed or moved) leave the mirror and
+    # everything derived from it.
+    if not page_ids:
+        return
+    touch(conn, database_id)
+    if database_id in rollups.SPECS:
+        rollups.apply(conn, database_id, _stored(conn, page_ids), [])
+    dedup.apply(conn, database_id, [{"id": page_id} for page_id in page_ids], [])
+    conn.executemany("DELETE FROM pages WHERE page_id = ?", [(page_id,) for page_id in page_ids])
+
+
+def forget(database_id, page_ids):
+    # E.g. a page that answered 404.
+    with connect() as conn:
+        _remove(conn, database_id, list(page_ids))
+
+
+def upsert(database_id, page):
+    # Record a page returned by pages.create / pages.update without a round-trip.
+    upsert_many(database_id, [page])
+
+
+def upsert_many(database_id, pages):
+    with connect() as conn:
+        write_pages(conn, database_id, pages)
+
+
+def get_cursor(database_id):
+    with connect() as conn:
+        row = conn.execute("SELECT cursor FROM sync_state WHERE database_id = ?", (database_id,)).fetchone()
+    return row[0] if row else None
+
+
+def request_sync(database_id, full=False):
+    # Asks the sync worker (sync_worker.py) to sync this database now; full
+    # also reconciles deletions.
+    with connect() as conn:
+        conn.execute(
+            "INSERT INTO sync_requests (database_id, requested_at, full) VALUES (?, ?, ?) "
+            "ON CONFLICT(database_id) DO UPDATE SET requested_at = excluded.requested_at, "
+            "full = MAX(full, excluded.full)",
+            (database_id, time.time(), int(full)),
+        )
+
+
+def take_sync_requests():
+    # {database_id: full}
+    with connect() as conn:
+        requested = {database_id: bool(full) for database_id, full in conn.execute(
+            "SELECT database_id, full FROM sync_requests")}
+        conn.execute("DELETE FROM sync_requests")
+    return requested
+
+
+def _heartbeat_path():
+    return MIRROR_PATH + ".worker"
+
+
+def beat():
+    # The sync worker checking in. A file's mtime rather than a row, so checking
+    # in never waits on the mirror's write lock.
+    path = _heartbeat_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a"):
+        pass
+    os.utime(path)
+
+
+def worker_seen_within(seconds):
+    try:
+        return time.time() - os.path.getmtime(_heartbeat_path()) < seconds
+    except FileNotFoundError:
+        return False
+
+
+def sync(notion, database_id, properties=None, archived_property=None, full=False):
+    # full: read every live page and reconcile. Incremental syncs only see
+    # pages whose last_edited_time moved, never ones deleted or trashed in
+    # Notion; a full sync drops mirrored pages Notion no longer returns.
+    cursor = None if full else get_cursor(database_id)
+    if cursor:
+        # Incremental syncs must also see pages that were just archived, so the
+        # Archived filter is only pushed down on a cold sync. Notion rounds
+        # last_edited_time to the minute, so the cursor minute is re-read.
+        query = build_query(database_id, properties=properties, edited_since=cursor)
+    else:
+        query = build_query(database_id, properties=properties, archived_property=archived_property)
+
+    # Fetch first, then write in one short transaction: holding the write lock
+    # across network calls would block outbox.enqueue for the whole sync. A
+    # failed fetch leaves the old mirror intact.
+    fetched = {}
+    for batch in iter_batches(notion, query, prefetch=True):
+        fetched.update((p["id"], p) for p in batch)
+    newest = max([cursor or ""] + [p.get("last_edited_time") or "" for p in fetched.values()])
+
+    with connect() as conn:
+        stored = dict(conn.execute(
+            "SELECT page_id, page FROM pages WHERE database_id = ?", (database_id,)
+        )) if full else _stored_json(conn, list(fetched))
+        # Only pages that changed are rewritten, so a sync that finds nothing
+        # new (the cursor minute is re-read every time) leaves the version,
+        # and everything keyed on it, alone. Compared by content: edits within
+        # one minute share a last_edited_time. An archived page that is not
+        # mirrored has nothing to drop.
+        changed = [
+            p for p in fetched.values()
+            if (p["id"] in stored or not _is_archived(p))
+            and stored.get(p["id"]) != json.dumps(_slim(p))
+        ]
+        write_pages(conn, database_id, changed)
+        if full:
+            _remove(conn, database_id, [page_id for page_id in stored if page_id not in fetched])
+        conn.execute(
+            "INSERT INTO sync_state (database_id, cursor) VALUES (?, ?) "
+            "ON CONFLICT(database_id) DO UPDATE SET cursor = excluded.cursor",
+            (database_id, newest or None),
+        )
+    return len(changed)
+
+
+def iter_pages(database_id, chunk_size=500):
+    with connect() as conn:
+        rows = conn.execute("SELECT page FROM pages WHERE database_id = ? ORDER BY date, rowid", (database_id,))
+        while True:
+            chunk = rows.fetchmany(chunk_size)
+            if not chunk:
+                break
+            for row in chunk:
+                yield json.loads(row[0])
@@ -0,0 +1,349 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import streamlit as st
+
+from shared import bulk, mirror, uploads
+
+# Durable write-behind queue for the "Add" buttons. A write is committed to
+# SQLite immediately, shown optimistically, and flushed to Notion by a
+# background worker with retries.
+
+ID_PREFIX = "outbox:"
+MAX_ATTEMPTS = 6
+BATCH_SIZE = 20
+POLL_SECONDS = 30
+# How long a flusher owns the entries it claimed. A flusher that dies mid-send
+# (a restarted worker, a web process falling back) leaves them 'sending'; once
+# the lease runs out another flusher takes them over.
+LEASE_SECONDS = 300
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        key TEXT PRIMARY KEY,
+        database_id TEXT NOT NULL,
+        properties TEXT NOT NULL,
+        files_property TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt REAL NOT NULL DEFAULT 0,
+        error TEXT,
+        created_time TEXT NOT NULL,
+        sent INTEGER NOT NULL DEFAULT 0,
+        known TEXT,
+        lease_until REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outbox_files (
+        key TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (key, position)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outbox_claims (
+        page_id TEXT PRIMARY KEY,
+        created_time TEXT NOT NULL
+    )
+    """,
+]
+
+# Columns added since the outbox table was first shipped; queued writes must
+# survive an upgrade, so they are added in place rather than recreated.
+_ADDED_COLUMNS = {"sent": "INTEGER NOT NULL DEFAULT 0", "known": "TEXT", "lease_until": "REAL NOT NULL DEFAULT 0"}
+
+_ready = set()
+
+
+def _ensure(conn):
+    if mirror.MIRROR_PATH in _ready:
+        return
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    have = {row[1] for row in conn.execute("PRAGMA table_info(outbox)")}
+    for name, declaration in _ADDED_COLUMNS.items():
+        if name not in have:
+            conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {declaration}")
+    _ready.add(mirror.MIRROR_PATH)
+
+
+def enqueue(database_id, properties, files=None, files_property=None):
+    # `files` are (name, bytes) pairs uploaded by the worker; their URLs are
+    # written " | "-joined into `files_property`.
+    return enqueue_many(database_id, [properties], files=files, files_property=files_property)[0]
+
+
+def enqueue_many(database_id, properties_list, files=None, files_property=None):
+    # Queues several pages in one transaction, e.g. a bank statement import.
+    keys = [str(uuid.uuid4()) for _ in properties_list]
+    # Minute precision, matching Notion's created_time used by _already_created.
+    created = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+    with mirror.connect() as conn:
+        _ensure(conn)
+        conn.executemany(
+            "INSERT INTO outbox (key, database_id, properties, files_property, created_time) VALUES (?, ?, ?, ?, ?)",
+            [(key, database_id, json.dumps(properties), files_property, created)
+             for key, properties in zip(keys, properties_list)],
+        )
+        conn.executemany(
+            "INSERT INTO outbox_files (key, position, name, data) VALUES (?, ?, ?, ?)",
+            [(key, i, name, data) for key in keys for i, (name, data) in enumerate(files or [])],
+        )
+        mirror.touch(conn, database_id)
+    return keys
+
+
+def entries(database_id, status=None):
+    with mirror.connect() as conn:
+        _ensure(conn)
+        sql = "SELECT key, properties, status, attempts, error, created_time FROM outbox WHERE database_id = ?"
+        args = [database_id]
+        if status:
+            sql += " AND status = ?"
+            args.append(status)
+        rows = conn.execute(sql + " ORDER BY created_time", args).fetchall()
+    return [
+        {"key": k, "properties": json.loads(p), "status": s, "attempts": a, "error": e, "created_time": c}
+        for k, p, s, a, e, c in rows
+    ]
+
+
+def pending_pages(database_id):
+    # Queued writes shaped like Notion pages so the page decoders can show them.
+    return [
+        {"id": ID_PREFIX + e["key"], "created_time": e["created_time"], "properties": e["properties"]}
+        for e in entries(database_id)
+    ]
+
+
+def retry(key):
+    # `sent` stays set: an earlier attempt may still have created the page.
+    with mirror.connect() as conn:
+        conn.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt = 0 WHERE key = ? AND status = 'failed'",
+            (key,),
+        )
+
+
+def discard(key):
+    with mirror.connect() as conn:
+        row = conn.execute("SELECT database_id FROM outbox WHERE key = ?", (key,)).fetchone()
+        if row:
+            mirror.touch(conn, row[0])
+        conn.execute("DELETE FROM outbox WHERE key = ?", (key,))
+        conn.execute("DELETE FROM outbox_files WHERE key = ?", (key,))
+
+
+# --- Flushing ---
+def _title(properties):
+    for name, prop in properties.items():
+        if "title" in prop:
+            return name, "".join(t["text"]["content"] for t in prop["title"])
+    return None, None
+
+
+def _filters(properties):
+    # Equality filters on every value the entry sets (title, amounts, person,
+    # date), so a common title such as "Safeway" alone never matches.
+    found = []
+    for name, prop in properties.items():
+        if "title" in prop:
+            found.append({"property": name, "title": {"equals": "".join(t["text"]["content"] for t in prop["title"])}})
+        elif prop.get("number") is not None:
+            found.append({"property": name, "number": {"equals": prop["number"]}})
+        elif (prop.get("select") or {}).get("name"):
+            found.append({"property": name, "select": {"equals": prop["select"]["name"]}})
+        elif (prop.get("date") or {}).get("start"):
+            found.append({"property": name, "date": {"equals": prop["date"]["start"]}})
+    return found
+
+
+def _already_created(notion, entry):
+    # Notion has no idempotency keys, so a retry first looks for the pages a
+    # previous, possibly timed-out attempt may have created. Pages that were
+    # mirrored before that attempt started (entry["known"]) are someone else's.
+    filters = _filters(entry["properties"])
+    if not any("title" in f for f in filters):
+        return []
+    response = notion.databases.query(
+        database_id=entry["database_id"],
+        filter={"and": filters + [
+            {"timestamp": "created_time", "created_time": {"on_or_after": entry["created_time"]}},
+        ]},
+        page_size=100,
+    )
+    return [page for page in response.get("results", []) if page["id"] not in entry["known"]]
+
+
+def _send(notion, entry, claims):
+    # claims: {"pages": page IDs other entries already own, "lock": Lock}.
+    if entry["sent"]:
+        for page in _already_created(notion, entry):
+            with claims["lock"]:
+                if page["id"] not in claims["pages"]:
+                    claims["pages"].add(page["id"])
+                    return page
+    properties = dict(entry["properties"])
+    if entry["files"]:
+        urls = uploads.upload_all(entry["files"])
+        properties[entry["files_property"]] = {"url": " | ".join(urls) if urls else None}
+    page = notion.pages.create(parent={"database_id": entry["database_id"]}, properties=properties)
+    with claims["lock"]:
+        claims["pages"].add(page["id"])
+    return page
+
+
+def _known(conn, entry):
+    # Mirrored pages created since the entry was queued, before this attempt:
+    # lookalikes of those are not this entry's page.
+    rows = conn.execute(
+        "SELECT page_id FROM pages WHERE database_id = ? AND json_extract(page, '$.created_time') >= ?",
+        (entry["database_id"], entry["created_time"]),
+    )
+    return [r[0] for r in rows]
+
+
+def _claimable(now):
+    return "(status = 'pending' AND next_attempt <= ?) OR (status = 'sending' AND lease_until < ?)", (now, now)
+
+
+def _due():
+    # Claims up to BATCH_SIZE due entries for this flusher. The claim is a
+    # conditional UPDATE, so of two flushers (a taking-over worker, several
+    # web processes falling back) only one gets each entry.
+    now = time.time()
+    where, args = _claimable(now)
+    batch = []
+    with mirror.connect() as conn:
+        _ensure(conn)
+        rows = conn.execute(
+            "SELECT key, database_id, properties, files_property, attempts, created_time, sent, known FROM outbox "
+            f"WHERE {where} ORDER BY created_time LIMIT ?",
+            (*args, BATCH_SIZE),
+        ).fetchall()
+        for key, database_id, properties, files_property, attempts, created, sent, known in rows:
+            entry = {
+                "key": key, "database_id": database_id, "properties": json.loads(properties),
+                "files_property": files_property, "attempts": attempts, "created_time": created,
+                "sent": bool(sent), "known": set(json.loads(known or "[]")),
+            }
+            # From here on an attempt may reach Notion, so whoever sends this
+            # entry next looks for its page first, ignoring pages mirrored now.
+            claimed = conn.execute(
+                f"UPDATE outbox SET status = 'sending', lease_until = ?, sent = 1, known = ? WHERE key = ? AND ({where})",
+                (now + LEASE_SECONDS, known if sent else json.dumps(_known(conn, entry)), key, *args),
+            )
+            if not claimed.rowcount:
+                continue
+            entry["files"] = conn.execute(
+                "SELECT name, data FROM outbox_files WHERE key = ? ORDER BY position", (key,)
+            ).fetchall()
+            batch.append(entry)
+    return batch
+
+
+def flush(notion):
+    batch = _due()
+    with mirror.connect() as conn:
+        claimed = {r[0] for r in conn.execute("SELECT page_id FROM outbox_claims")}
+    claims = {"pages": claimed, "lock": threading.Lock()}
+
+    def record(entry, page, error):
+        with mirror.connect() as conn:
+            if error is None:
+                # Swap the optimistic row for the real page in one transaction,
+                # and keep the page claimed while older entries may still look
+                # for theirs.
+                mirror.write_pages(conn, entry["database_id"], [page])
+                conn.execute("DELETE FROM outbox WHERE key = ?", (entry["key"],))
+                conn.execute("DELETE FROM outbox_files WHERE key = ?", (entry["key"],))
+                conn.execute(
+                    "INSERT OR IGNORE INTO outbox_claims (page_id, created_time) VALUES (?, ?)",
+                    (page["id"], page.get("created_time") or entry["created_time"]),
+                )
+                conn.execute(
+                    "DELETE FROM outbox_claims WHERE NOT EXISTS "
+                    "(SELECT 1 FROM outbox WHERE outbox.created_time <= outbox_claims.created_time)"
+                )
+                return
+            # Not retried here: a create that failed may still have reached
+            # Notion, so the next flush looks for the page first.
+            attempts = entry["attempts"] + 1
+            status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+            conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, error = ? WHERE key = ?",
+                (status, attempts, time.time() + min(300, 2 ** attempts), str(error), entry["key"]),
+            )
+
+    bulk.run(lambda entry: _send(notion, entry, claims), batch, on_result=record)
+    return len(batch)
+
+
+def _seconds_until_due():
+    with mirror.connect() as conn:
+        _ensure(conn)
+        row = conn.execute(
+            "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt ELSE lease_until END) FROM outbox "
+            "WHERE status IN ('pending', 'sending')"
+        ).fetchone()
+    if row[0] is None:
+        return POLL_SECONDS
+    return min(POLL_SECONDS, max(0.0, row[0] - time.time()))
+
+
+class Worker:
+    def __init__(self, notion, paused=None):
+        # paused(): True while someone else (the sync worker) flushes.
+        self.notion = notion
+        self.paused = paused
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name="outbox-worker", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wake(self):
+        self.wakeup.set()
+
+    def _loop(self):
+        while True:
+            try:
+                if self.paused and self.paused():
+                    delay = POLL_SECONDS
+                else:
+                    flush(self.notion)
+                    delay = _seconds_until_due()
+            except Exception:
+                delay = POLL_SECONDS
+            if delay > 0:
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+
+
+# --- UI ---
+def render_status(database_id):
+    queued = entries(database_id)
+    if not queued:
+        return
+    waiting = [e for e in queued if e["status"] in ("pending", "sending")]
+    failed = [e for e in queued if e["status"] == "failed"]
+    if waiting:
+        st.caption(f"⏳ {len(waiting)} entr{'y' if len(waiting) == 1 else 'ies'} waiting to sync to Notion")
+    for e in failed:
+        _, text = _title(e["properties"])
+        col1, col2, col3 = st.columns([4, 1, 1])
+        col1.warning(f"⚠️ Not saved to Notion: **{text or 'Untitled'}** — {e['error']}")
+        if col2.button("Retry", key=f"retry_{e['key']}"):
+            retry(e["key"])
+            st.rerun()
+        if col3.button("Discard", key=f"discard_{e['key']}"):
+            discard(e["key"])
+            st.rerun()
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# One paginator for every databases.query call. Pages are yielded as each
+# response arrives instead of being collected into one big list.
+
+
+def iter_batches(notion, query, prefetch=False):
+    # With prefetch, the request for the next cursor is already in flight
+    # while the caller is still working on the current batch.
+    if not prefetch:
+        response = notion.databases.query(**query)
+        yield response.get("results", [])
+        while response.get("has_more"):
+            response = notion.databases.query(**query, start_cursor=response.get("next_cursor"))
+            yield response.get("results", [])
+        return
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(lambda: notion.databases.query(**query))
+        while future is not None:
+            response = future.result()
+            future = None
+            if response.get("has_more"):
+                next_cursor = response.get("next_cursor")
+                future = pool.submit(lambda: notion.databases.query(**query, start_cursor=next_cursor))
+            yield response.get("results", [])
+
+
+def iter_pages(notion, query, prefetch=False):
+    for batch in iter_batches(notion, query, prefetch=prefetch):
+        yield from batch
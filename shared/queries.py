@@ -0,0 +1,27 @@
+# Builds databases.query kwargs so filtering, sorting and property projection
+# happen on Notion's side instead of after downloading every page.
+
+
+def build_query(database_id, properties=None, archived_property=None, date_property="Date",
+                date_from=None, date_to=None, edited_since=None, sort_direction="ascending", archived=False):
+    # archived_property filters to live pages, or to archived ones with archived=True.
+    filters = []
+    if archived_property:
+        filters.append({"property": archived_property, "checkbox": {"equals": archived}})
+    if date_from:
+        filters.append({"property": date_property, "date": {"on_or_after": str(date_from)}})
+    if date_to:
+        filters.append({"property": date_property, "date": {"on_or_before": str(date_to)}})
+    if edited_since:
+        filters.append({"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": edited_since}})
+
+    query = {"database_id": database_id}
+    if len(filters) == 1:
+        query["filter"] = filters[0]
+    elif filters:
+        query["filter"] = {"and": filters}
+    if date_property:
+        query["sorts"] = [{"property": date_property, "direction": sort_direction}]
+    if properties:
+        query["filter_properties"] = list(properties)
+    return query
@@ -0,0 +1,115 @@
+import html
+import math
+
+import streamlit as st
+
+from shared import thumbs
+
+# HTML receipt table for Tax Receipts. Cells are built with vectorized string
+# operations and joined once, and only the visible page is sent to the browser.
+
+PAGE_SIZES = [25, 50, 100]
+
+_TD = '<td style="padding:8px 12px;">'
+_TD_CENTER = '<td style="padding:8px 12px; text-align:center;">'
+_LINK_OPEN = '<a href="'
+_LINK_CLOSE = '" target="_blank" style="color:#333333; text-decoration:none;">📸 View</a>'
+_HEADER = (
+    '<table style="width:100%; border-collapse:collapse; font-size:14px;">'
+    '<thead><tr style="border-bottom: 1px solid #e0e0e0;">'
+    + "".join(
+        f'<th style="text-align:left; padding:8px 12px; font-weight:normal; color:#888;">{name}</th>'
+        for name in ["Date", "Description", "Amount", "Category", "Who", "Receipt"]
+    )
+    + '</tr></thead><tbody>'
+)
+_FOOTER = '</tbody></table>'
+
+
+def _escape(series):
+    return (
+        series.astype(str)
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+    )
+
+
+@st.cache_resource
+def _links_by_frame():
+    return {}
+
+
+def link_cells(df):
+    # "a | b" -> two View links for every row of `df`, the data.frame()
+    # result. That frame is shared and replaced (never modified) on each
+    # sync or write, so the cells are cached on the frame object itself:
+    # built once per frame, and never reused for different URLs.
+    cache = _links_by_frame()
+    hit = cache.get("frame")
+    if hit is not None and hit[0] is df:
+        return hit[1]
+    raw = df["Receipt URL"]
+    urls = _escape(raw)
+    links = _LINK_OPEN + urls.str.replace(" | ", _LINK_CLOSE + " " + _LINK_OPEN, regex=False) + _LINK_CLOSE
+    cells = links.where(raw != "", "—").to_numpy()
+    cache["frame"] = (df, cells)
+    return cells
+
+
+def _rows_html(df):
+    # astype(str): on an empty frame map() keeps the float dtype, which does
+    # not concatenate with strings.
+    amounts = (df["Amount"] / 100).map("${:,.2f}".format).astype(str)
+    rows = (
+        '<tr style="border-bottom: 1px solid #f0f0f0;">'
+        + _TD_CENTER + _escape(df["Date"]) + '</td>'
+        + _TD + _escape(df["Description"]) + '</td>'
+        + _TD + amounts + '</td>'
+        + _TD + _escape(df["Category"]) + '</td>'
+        + _TD_CENTER + _escape(df["Who"]) + '</td>'
+        + _TD_CENTER + df["Links"].astype(str) + '</td>'
+        + '</tr>'
+    )
+    return "".join(rows.tolist())
+
+
+def _with_previews(visible):
+    # Links cells of the visible rows, led by a cached thumbnail of the first
+    # photo. Missing thumbnails are queued and show up on a later rerun.
+    first = visible["Receipt URL"].str.split(" | ", n=1, regex=False).str[0]
+    thumbs.prefetch(first)
+    cells = []
+    for url, links in zip(first, visible["Links"]):
+        uri = thumbs.data_uri(url) if url else None
+        if uri:
+            links = (
+                f'<a href="{html.escape(url)}" target="_blank"><img src="{uri}" alt="" '
+                'style="height:40px; border-radius:4px; vertical-align:middle;"></a> ' + links
+            )
+        cells.append(links)
+    return cells
+
+
+def render(df, key="receipts"):
+    # `df` needs a "Links" column from link_cells().
+    if df.empty:
+        st.info("No receipts to show.")
+        return
+    col1, col2 = st.columns(2)
+    size = col1.selectbox("Rows per page", PAGE_SIZES, index=0, key=f"{key}_size")
+    page_count = max(1, math.ceil(len(df) / size))
+    # The widget's value lives only in session state (no value=), so it can be
+    # clamped here when a search or a smaller page size leaves fewer pages.
+    page_key = f"{key}_page"
+    if page_key not in st.session_state:
+        st.session_state[page_key] = 1
+    elif st.session_state[page_key] > page_count:
+        st.session_state[page_key] = page_count
+    page = col2.number_input("Page", min_value=1, max_value=page_count, step=1, key=page_key)
+    start = (page - 1) * size
+    visible = df.iloc[start:start + size]
+    visible = visible.assign(Links=_with_previews(visible))
+    st.markdown(_HEADER + _rows_html(visible) + _FOOTER, unsafe_allow_html=True)
+    st.caption(f"Showing {start + 1}–{start + len(visible)} of {len(df)}")
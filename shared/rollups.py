@@ -0,0 +1,78 @@
+import json
+
+from shared import schema
+
+# Materialized totals per group of select values, e.g. tax receipts per
+# (Year, Category, Who). mirror.write_pages() applies each write as a delta
+# (old page out, new page in), so reading totals costs O(groups) instead of a
+# scan over every page. A definition that changed since the rows were built
+# is rebuilt from the mirrored pages on the next read.
+
+# database_id -> (key fields, amount field)
+SPECS = {}
+
+
+def define(database_id, keys, amount):
+    if database_id:
+        SPECS[database_id] = (keys, amount)
+
+
+def _signature(spec):
+    keys, amount = spec
+    return json.dumps([list(f) for f in keys] + [list(amount)])
+
+
+def _deltas(spec, pages, sign, into):
+    keys, amount = spec
+    key_fns = [schema.extractor(f) for f in keys]
+    amount_fn = schema.extractor(amount)
+    for page in pages:
+        group = json.dumps([fn(page) for fn in key_fns])
+        cents, count = into.get(group, (0, 0))
+        into[group] = (cents + sign * round(amount_fn(page) * 100), count + sign)
+    return into
+
+
+def _add(conn, database_id, deltas):
+    conn.executemany(
+        "INSERT INTO rollups (database_id, grp, cents, count) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(database_id, grp) DO UPDATE SET cents = cents + excluded.cents, count = count + excluded.count",
+        [(database_id, group, cents, count) for group, (cents, count) in deltas.items() if cents or count],
+    )
+    conn.execute("DELETE FROM rollups WHERE database_id = ? AND count = 0", (database_id,))
+
+
+def apply(conn, database_id, old_pages, new_pages):
+    # old_pages: the mirrored versions being replaced or removed.
+    spec = SPECS.get(database_id)
+    if spec:
+        _add(conn, database_id, _deltas(spec, new_pages, 1, _deltas(spec, old_pages, -1, {})))
+
+
+def _rebuild(conn, database_id, spec):
+    conn.execute("DELETE FROM rollups WHERE database_id = ?", (database_id,))
+    rows = conn.execute("SELECT page FROM pages WHERE database_id = ?", (database_id,))
+    _add(conn, database_id, _deltas(spec, (json.loads(r[0]) for r in rows), 1, {}))
+    conn.execute(
+        "INSERT INTO rollup_specs (database_id, spec) VALUES (?, ?) "
+        "ON CONFLICT(database_id) DO UPDATE SET spec = excluded.spec",
+        (database_id, _signature(spec)),
+    )
+
+
+def totals(conn, database_id, extra_pages=()):
+    # One row per group: key columns, amount column (cents) and Count.
+    # extra_pages (e.g. queued outbox writes) are added on the fly.
+    import pandas as pd
+
+    spec = SPECS[database_id]
+    keys, amount = spec
+    stored = conn.execute("SELECT spec FROM rollup_specs WHERE database_id = ?", (database_id,)).fetchone()
+    if stored is None or stored[0] != _signature(spec):
+        _rebuild(conn, database_id, spec)
+    rows = conn.execute("SELECT grp, cents, count FROM rollups WHERE database_id = ?", (database_id,))
+    groups = {group: (cents, count) for group, cents, count in rows}
+    _deltas(spec, extra_pages, 1, groups)
+    columns = [f.column for f in keys] + [amount.column, "Count"]
+    rows = [json.loads(group) + [cents, count] for group, (cents, count) in groups.items() if count]
+    return pd.DataFrame(rows, columns=columns).astype({amount.column: "int64", "Count": "int64"})
@@ -0,0 +1,165 @@
+import json
+import re
+
+from shared import bulk, mirror, schema, settlement
+from shared.paginate import iter_pages
+from shared.queries import build_query
+
+# Round history for the budget. "Clear & Start New Round" stores a compact
+# snapshot of the round (totals, per-person spend, settlement, item count,
+# date span, spend per month) so history and trends never need the archived
+# pages again. Rounds cleared before snapshots existed are rebuilt once from
+# Notion: archived expenses created between two "New Round Started" markers
+# form one round.
+#
+# Clearing is a durable job (round_clears), run by the sync worker or, without
+# one, by the page: reconcile the mirror, snapshot the live expenses, create
+# the archived marker page, then archive the expenses through bulk.
+
+MARKER = re.compile(r"^--- New Round Started: (\d{4}-\d{2}-\d{2}) ---$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    database_id TEXT NOT NULL,
+    round_id TEXT NOT NULL,
+    cleared_at TEXT NOT NULL,
+    snapshot TEXT NOT NULL,
+    PRIMARY KEY (database_id, round_id)
+)
+"""
+_CLEAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS round_clears (
+    database_id TEXT PRIMARY KEY,
+    cleared_at TEXT NOT NULL,
+    marker TEXT NOT NULL
+)
+"""
+_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds_backfilled (
+    database_id TEXT PRIMARY KEY
+)
+"""
+
+
+def marker_title(date):
+    return f"--- New Round Started: {date} ---"
+
+
+def snapshot(df, cleared_at, weights=None):
+    # df: the round's expenses as decoded by schema.BUDGET (Cost in cents).
+    dated = df[df["Date"] != "No Date"]
+    spent = settlement.totals(df, "Cost")
+    months = dated.groupby(dated["Date"].str[:7])["Cost"].sum()
+    return {
+        "cleared_at": cleared_at,
+        "first_date": dated["Date"].min() if len(dated) else None,
+        "last_date": dated["Date"].max() if len(dated) else None,
+        "items": len(df),
+        "total": int(df["Cost"].sum()),
+        "spent": spent,
+        "transfers": settlement.transfers(settlement.balances(spent, weights)),
+        "unsplit": settlement.unsplit(spent, weights),
+        "months": {month: int(cents) for month, cents in months.items()},
+    }
+
+
+def record(database_id, round_id, snap):
+    # Keyed by the round's marker page, so recording twice is harmless.
+    with mirror.connect() as conn:
+        conn.execute(_SCHEMA)
+        conn.execute(
+            "INSERT OR IGNORE INTO rounds (database_id, round_id, cleared_at, snapshot) VALUES (?, ?, ?, ?)",
+            (database_id, round_id, snap["cleared_at"], json.dumps(snap)),
+        )
+
+
+def request_clear(database_id, cleared_at, marker):
+    # marker: properties of the archived "New Round Started" page. A clear
+    # already waiting is kept as it is.
+    with mirror.connect() as conn:
+        conn.execute(_CLEAR_SCHEMA)
+        conn.execute(
+            "INSERT OR IGNORE INTO round_clears (database_id, cleared_at, marker) VALUES (?, ?, ?)",
+            (database_id, cleared_at, json.dumps(marker)),
+        )
+
+
+def clear_requested(database_id):
+    with mirror.connect() as conn:
+        conn.execute(_CLEAR_SCHEMA)
+        return conn.execute("SELECT 1 FROM round_clears WHERE database_id = ?", (database_id,)).fetchone() is not None
+
+
+def run_clear(notion, database_id, weights=None, on_progress=None):
+    # Runs a requested clear, then archives whatever is pending (also what a
+    # failed earlier run left). Returns bulk.archive_pending()'s (done, failed).
+    with mirror.connect() as conn:
+        conn.execute(_CLEAR_SCHEMA)
+        row = conn.execute("SELECT cleared_at, marker FROM round_clears WHERE database_id = ?",
+                           (database_id,)).fetchone()
+    if row:
+        cleared_at, marker = row
+        # Reconciled first, so the snapshot neither counts pages deleted in
+        # Notion nor misses ones not synced yet. Queued outbox writes are not
+        # in the mirror and carry over to the next round.
+        mirror.sync(notion, database_id, properties=schema.BUDGET_PROPERTIES, archived_property="Archived", full=True)
+        closing = schema.decode(mirror.iter_pages(database_id), schema.BUDGET)
+        page = notion.pages.create(parent={"database_id": database_id}, properties=json.loads(marker))
+        record(database_id, page["id"], snapshot(closing, cleared_at, weights))
+        bulk.start(database_id, closing["id"])
+        with mirror.connect() as conn:
+            conn.execute("DELETE FROM round_clears WHERE database_id = ?", (database_id,))
+    return bulk.archive_pending(notion, database_id, on_progress)
+
+
+def history(database_id):
+    # Oldest first.
+    with mirror.connect() as conn:
+        conn.execute(_SCHEMA)
+        rows = conn.execute(
+            "SELECT snapshot FROM rounds WHERE database_id = ? ORDER BY cleared_at, rowid", (database_id,)
+        ).fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def backfilled(database_id):
+    with mirror.connect() as conn:
+        conn.execute(_STATE_SCHEMA)
+        return conn.execute("SELECT 1 FROM rounds_backfilled WHERE database_id = ?", (database_id,)).fetchone() is not None
+
+
+def backfill(notion, database_id, weights=None):
+    # One pass over the archived pages, in creation order. Returns the number
+    # of rounds found.
+    query = build_query(database_id, properties=schema.BUDGET_PROPERTIES, archived_property="Archived", archived=True)
+    title = schema.extractor(next(f for f in schema.BUDGET if f.column == "Item"))
+    pages = sorted(iter_pages(notion, query, prefetch=True), key=lambda p: p.get("created_time") or "")
+    current, found = [], 0
+    for page in pages:
+        match = MARKER.match(title(page))
+        if not match:
+            current.append(page)
+            continue
+        if current:
+            df = schema.decode(current, schema.BUDGET)
+            record(database_id, page["id"], snapshot(df, match.group(1), weights))
+            found += 1
+        current = []
+    with mirror.connect() as conn:
+        conn.execute(_STATE_SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO rounds_backfilled (database_id) VALUES (?)", (database_id,))
+    return found
+
+
+def monthly(rounds):
+    # Spend per calendar month across all rounds, with the change on the
+    # previous month. Built from the snapshots alone.
+    import pandas as pd
+
+    months = {}
+    for snap in rounds:
+        for month, cents in snap["months"].items():
+            months[month] = months.get(month, 0) + cents
+    trend = pd.DataFrame(sorted(months.items()), columns=["Month", "Total"])
+    trend["Change"] = trend["Total"].pct_change()
+    return trend
@@ -0,0 +1,76 @@
+import bisect
+import math
+from datetime import date, timedelta
+
+# Contribution time series for Wolfie's Fund, read from the mirror's
+# (Date, Who) rollup: the rollup takes each new contribution as an O(1)
+# delta, and this keeps one running total per person over the days that have
+# contributions. Totals on a date, savings rates and goal dates are bisects
+# into those running totals, so any number of goals is served without
+# rescanning the contributions. Contributions are assumed non-negative, so
+# running totals only grow.
+
+RATE_DAYS = 90
+
+
+def _day_before(day):
+    return (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+
+class Savings:
+    def __init__(self, daily, amount="Amount"):
+        # daily: one row per (Date, Who) with `amount` in cents, e.g. data.rollup().
+        self.daily = daily[daily["Date"].str.match(r"^\d{4}-\d{2}-\d{2}$")]
+        self.amount = amount
+        # person -> ([day], [running total on that day]); None is everyone.
+        self.series = {}
+        rows = sorted(zip(self.daily["Date"], self.daily["Who"], self.daily[amount]))
+        for day, person, cents in rows:
+            for key in (person, None):
+                days, totals = self.series.setdefault(key, ([], []))
+                if days and days[-1] == day:
+                    totals[-1] += int(cents)
+                else:
+                    days.append(day)
+                    totals.append((totals[-1] if totals else 0) + int(cents))
+
+    def total(self, person=None, on=None):
+        # Cents saved by `person` (everyone when None) up to and including `on`.
+        days, totals = self.series.get(person, ([], []))
+        i = len(days) if on is None else bisect.bisect_right(days, on)
+        return totals[i - 1] if i else 0
+
+    def saved(self, person=None, since=None):
+        # Cents saved from `since` on (all time when None).
+        return self.total(person) - (self.total(person, _day_before(since)) if since else 0)
+
+    def rate(self, person=None, today=None, days=RATE_DAYS):
+        # Cents per day over the last `days` days.
+        today = today or date.today().isoformat()
+        start = (date.fromisoformat(today) - timedelta(days=days)).isoformat()
+        return (self.total(person, today) - self.total(person, start)) / days
+
+    def reached(self, target, person=None, since=None):
+        # The day `person` reached `target` cents saved from `since` on, or None.
+        days, totals = self.series.get(person, ([], []))
+        base = self.total(person, _day_before(since)) if since else 0
+        i = bisect.bisect_left(totals, base + target)
+        return days[i] if i < len(days) else None
+
+    def forecast(self, target, person=None, since=None, today=None):
+        # (day, projected): the day the target was reached, else when it will
+        # be at the current rate (None when nothing was saved lately).
+        day = self.reached(target, person, since)
+        if day:
+            return day, False
+        today = today or date.today().isoformat()
+        rate = self.rate(person, today)
+        if rate <= 0:
+            return None, True
+        remaining = target - self.saved(person, since)
+        return (date.fromisoformat(today) + timedelta(days=math.ceil(remaining / rate))).isoformat(), True
+
+    def monthly(self):
+        # Cents saved per month (rows) and person (columns).
+        by_month = self.daily.assign(Month=self.daily["Date"].str[:7], Who=self.daily["Who"].astype(str))
+        return by_month.pivot_table(index="Month", columns="Who", values=self.amount, aggfunc="sum", fill_value=0)
@@ -0,0 +1,127 @@
+from collections import namedtuple
+
+# Declarative description of each Notion database: which property feeds which
+# column and how it is typed. decode() extracts pages straight into one list
+# per column instead of building a dict per row.
+#   money  -> int64 cents        select -> categorical
+#   title  -> str                date   -> str ("No Date" when empty)
+#   url    -> str                id     -> page id
+
+Field = namedtuple("Field", "column prop kind default")
+
+BUDGET = [
+    Field("id", None, "id", None),
+    Field("Date", "Date", "date", "No Date"),
+    Field("Item", "Item", "title", "Untitled"),
+    Field("Cost", "Cost", "money", 0),
+    Field("Who", "Who", "select", "Unknown"),
+]
+
+WOLFIE = [
+    Field("Date", "Date", "date", "No Date"),
+    Field("Note", "Note", "title", ""),
+    Field("Amount", "Amount", "money", 0),
+    Field("Who", "Who", "select", "Unknown"),
+]
+
+TAX = [
+    Field("id", None, "id", None),
+    Field("Date", "Date", "date", "No Date"),
+    Field("Description", "Description", "title", ""),
+    Field("Amount", "Amount", "money", 0),
+    Field("Category", "Category", "select", "Unknown"),
+    Field("Who", "Who", "select", "Unknown"),
+    Field("Year", "Year", "select", "Unknown"),
+    Field("Receipt URL", "Receipt", "url", ""),
+]
+
+
+# Tax totals the mirror keeps per (Year, Category, Who); see rollups.py.
+_TAX_FIELDS = {f.column: f for f in TAX}
+TAX_ROLLUP = ([_TAX_FIELDS["Year"], _TAX_FIELDS["Category"], _TAX_FIELDS["Who"]], _TAX_FIELDS["Amount"])
+
+
+def _pick(schema, *columns):
+    by_column = {f.column: f for f in schema}
+    return [by_column[c] for c in columns]
+
+
+# Wolfie contributions per (Date, Who), the series behind savings.py.
+WOLFIE_ROLLUP = (_pick(WOLFIE, "Date", "Who"), _pick(WOLFIE, "Amount")[0])
+
+
+# What makes two entries likely duplicates: date, amount, store/description
+# and person; see dedup.py.
+BUDGET_DEDUP = _pick(BUDGET, "Date", "Cost", "Item", "Who")
+WOLFIE_DEDUP = _pick(WOLFIE, "Date", "Amount", "Note", "Who")
+TAX_DEDUP = _pick(TAX, "Date", "Amount", "Description", "Who")
+
+
+def properties(schema):
+    return [f.prop for f in schema if f.prop]
+
+
+# Properties requested from Notion (filter_properties). Budget also needs
+# Archived so incremental syncs can see rows leave the round.
+BUDGET_PROPERTIES = properties(BUDGET) + ["Archived"]
+WOLFIE_PROPERTIES = properties(WOLFIE)
+TAX_PROPERTIES = properties(TAX)
+
+
+def extractor(field):
+    prop, default = field.prop, field.default
+    if field.kind == "id":
+        return lambda page: page["id"]
+    if field.kind == "title":
+        def title(page):
+            parts = page["properties"].get(prop, {}).get("title")
+            return parts[0]["text"]["content"] if parts else default
+        return title
+    if field.kind == "money":
+        def number(page):
+            value = page["properties"].get(prop, {}).get("number")
+            return default if value is None else value
+        return number
+    if field.kind == "select":
+        def select(page):
+            value = page["properties"].get(prop, {}).get("select")
+            return value.get("name", default) if value else default
+        return select
+    if field.kind == "date":
+        def date(page):
+            value = page["properties"].get(prop, {}).get("date")
+            return value.get("start", default) if value else default
+        return date
+    if field.kind == "url":
+        return lambda page: page["properties"].get(prop, {}).get("url") or default
+    raise ValueError(f"Unknown field kind: {field.kind}")
+
+
+def _column(field, values):
+    import numpy as np
+    import pandas as pd
+
+    if field.kind == "money":
+        return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+    if field.kind == "select":
+        return pd.Categorical(values)
+    return values
+
+
+def decode(pages, schema):
+    # pandas is imported here, not at module level, so a page can paint its
+    # header and form before paying for it.
+    import pandas as pd
+
+    extractors = [extractor(f) for f in schema]
+    columns = [[] for _ in schema]
+    appends = [c.append for c in columns]
+    pairs = list(zip(appends, extractors))
+    for page in pages:
+        for append, extract in pairs:
+            append(extract(page))
+    return pd.DataFrame({f.column: _column(f, values) for f, values in zip(schema, columns)})
+
+
+def dollars(cents):
+    return f"${cents / 100:,.2f}"
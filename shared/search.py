@@ -0,0 +1,173 @@
+import bisect
+import re
+import threading
+from datetime import date as _date
+
+# Inverted index for the search boxes. Every term of a row (title words,
+# select values, the amount, the date and its month name) maps to the ids of
+# the rows containing it. Terms are also kept in one sorted list, so a prefix
+# ("walm", "mar") is a bisect range instead of a scan. Terms in a query are
+# ANDed.
+#
+# refresh() is called with each new frame. It compares every row's indexed
+# text with what was indexed before and re-posts only the rows that changed,
+# so a write costs a few dict lookups per row, not a rebuild. Postings hold
+# small integer doc numbers (one per page id) rather than the ids themselves,
+# which keeps the set unions and intersections cheap.
+#
+# The index is shared by every session. search() refreshes and queries under
+# one lock, so the positions it returns always belong to the frame passed in.
+
+_WORD = re.compile(r"[0-9]{4}-[0-9]{2}(?:-[0-9]{2})?|[0-9]+(?:\.[0-9]+)?|[^\W_]+")
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+
+
+def terms(text):
+    return _WORD.findall(str(text).lower())
+
+
+def _date_terms(value):
+    # "2026-03-15" -> the date, "2026-03", "2026" and "march".
+    try:
+        d = _date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return []
+    return [value, value[:7], value[:4], MONTHS[d.month - 1]]
+
+
+def _texts(df, fields):
+    # One indexed string per row, built with vectorized string operations.
+    parts = []
+    for f in fields:
+        column = df[f.column]
+        if f.kind in ("title", "select"):
+            parts.append(column.astype(str))
+        elif f.kind == "money":
+            parts.append((column / 100).map("{:.2f}".format))
+        elif f.kind == "date":
+            parts.append(column.astype(str))
+    text = parts[0]
+    for part in parts[1:]:
+        text = text + " \x1f " + part
+    return text.tolist()
+
+
+class SearchIndex:
+    def __init__(self, fields):
+        # Fields of the frame to index (schema.Field); "id" identifies rows.
+        self.fields = [f for f in fields if f.kind in ("title", "select", "money", "date")]
+        self.dates = [i for i, f in enumerate(self.fields) if f.kind == "date"]
+        self.postings = {}
+        self.vocabulary = []
+        self.docs = {}
+        self.next_doc = 0
+        self.indexed = {}
+        self.rank = []
+        self.prefixes = {}
+        self.frame = None
+        self.lock = threading.Lock()
+
+    def _tokens(self, text):
+        tokens = set(terms(text))
+        if self.dates:
+            fields = text.split(" \x1f ")
+            for i in self.dates:
+                tokens.update(_date_terms(fields[i]))
+        for token in list(tokens):
+            # "45.20" is also found as "45".
+            if "." in token and token[0].isdigit():
+                tokens.add(token.split(".")[0])
+        return tokens
+
+    def _post(self, doc, text, sign):
+        for token in self._tokens(text):
+            if sign > 0:
+                ids = self.postings.get(token)
+                if ids is None:
+                    ids = self.postings[token] = set()
+                    bisect.insort(self.vocabulary, token)
+                ids.add(doc)
+            else:
+                ids = self.postings.get(token)
+                if ids is not None:
+                    ids.discard(doc)
+                    if not ids:
+                        del self.postings[token]
+                        del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def refresh(self, df):
+        # Cheap when called again with the same frame object.
+        with self.lock:
+            return self._refresh(df)
+
+    def _refresh(self, df):
+        if df is self.frame:
+            return 0
+        ids = df["id"].tolist()
+        texts = _texts(df, self.fields) if len(df) else []
+        changed = 0
+        seen = set(ids)
+        for page_id in [p for p in self.docs if p not in seen]:
+            doc = self.docs.pop(page_id)
+            self._post(doc, self.indexed.pop(doc), -1)
+            changed += 1
+        for page_id, text in zip(ids, texts):
+            doc = self.docs.get(page_id)
+            if doc is None:
+                doc = self.docs[page_id] = self.next_doc
+                self.next_doc += 1
+            old = self.indexed.get(doc)
+            if old == text:
+                continue
+            if old is not None:
+                self._post(doc, old, -1)
+            self._post(doc, text, 1)
+            self.indexed[doc] = text
+            changed += 1
+        # rank[doc] is the doc's row position in this frame.
+        self.rank = [-1] * self.next_doc
+        for position, page_id in enumerate(ids):
+            self.rank[self.docs[page_id]] = position
+        if changed:
+            self.prefixes = {}
+        self.frame = df
+        return changed
+
+    def _prefix(self, term):
+        # Short prefixes ("2", "wa") cover many terms; their unions are kept
+        # until the next change, so typing and reruns reuse them.
+        found = self.prefixes.get(term)
+        if found is not None:
+            return found
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "\uffff")
+        if end - start == 1:
+            return self.postings[self.vocabulary[start]]
+        found = set().union(*(self.postings[token] for token in self.vocabulary[start:end]))
+        self.prefixes[term] = found
+        return found
+
+    def query(self, text):
+        # Sorted row positions in the last refreshed frame matching every term.
+        with self.lock:
+            return self._query(text)
+
+    def search(self, df, text):
+        # Sorted row positions in `df` matching every term.
+        with self.lock:
+            self._refresh(df)
+            return self._query(text)
+
+    def _query(self, text):
+        words = terms(text)
+        if not words:
+            return []
+        matches = sorted((self._prefix(w) for w in words), key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result &= ids
+            if not result:
+                break
+        rank = self.rank
+        return sorted(rank[d] for d in result if rank[d] >= 0)
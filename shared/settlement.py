@@ -0,0 +1,66 @@
+import heapq
+
+# Splits a round between any number of payers. One groupby gives each
+# person's spend; balances are exact integer cents; transfers are found by
+# repeatedly settling the largest debtor against the largest creditor.
+
+
+def totals(df, amount, who="Who"):
+    # {person: cents} in one pass over the frame.
+    return {k: int(v) for k, v in df.groupby(who, observed=True)[amount].sum().items()}
+
+
+def shares(total, weights):
+    # Largest-remainder split so the shares add up to `total` exactly.
+    weight_sum = sum(weights.values())
+    if weight_sum <= 0:
+        raise ValueError("At least one split weight must be positive.")
+    raw = {p: total * w / weight_sum for p, w in weights.items()}
+    result = {p: int(v) for p, v in raw.items()}
+    leftover = total - sum(result.values())
+    for p in sorted(raw, key=lambda p: raw[p] - result[p], reverse=True)[:leftover]:
+        result[p] += 1
+    return result
+
+
+def unsplit(spent, weights=None):
+    # {payer: cents} paid by people outside `weights` (e.g. "Unknown" when Who
+    # was left empty). balances() leaves them out rather than guess a share.
+    if not weights:
+        return {}
+    return {p: cents for p, cents in spent.items() if p not in weights and cents}
+
+
+def balances(spent, weights=None):
+    # Positive: the person is owed money. Negative: the person owes.
+    # Without weights every payer gets an equal share; with weights only the
+    # people in them share the round (see unsplit() for the rest).
+    weights = dict(weights or {p: 1 for p in spent})
+    spent = {p: cents for p, cents in spent.items() if p in weights}
+    if not spent:
+        return {p: 0 for p in weights}
+    owed = shares(sum(spent.values()), {p: w for p, w in weights.items() if w > 0})
+    return {p: spent.get(p, 0) - owed.get(p, 0) for p in weights}
+
+
+def transfers(balance):
+    # [(debtor, creditor, cents)], at most len(balance) - 1 of them.
+    creditors = [(-cents, p) for p, cents in balance.items() if cents > 0]
+    debtors = [(cents, p) for p, cents in balance.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    result = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        result.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return result
+
+
+def settle(df, amount, weights=None, who="Who"):
+    return transfers(balances(totals(df, amount, who), weights))
@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Small JPEG previews of receipt images, cached on local disk and keyed by
+# the image URL. New uploads get theirs from the bytes already in hand; older
+# receipts are fetched in the background the first time they are shown. The
+# cache is trimmed to MAX_BYTES, least recently used first (a read bumps the
+# file's mtime).
+
+THUMB_DIR = os.environ.get("THUMB_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "thumbs"
+)
+MAX_BYTES = int(os.environ.get("THUMB_CACHE_MAX_BYTES", str(50 * 2**20)))
+SIZE = 160
+QUALITY = 70
+FETCH_WORKERS = 4
+
+_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="thumbs")
+_inflight = set()
+_failed = set()
+_lock = threading.Lock()
+
+
+def _path(url):
+    return os.path.join(THUMB_DIR, hashlib.sha256(url.encode()).hexdigest() + ".jpg")
+
+
+def make(data, size=SIZE, quality=QUALITY):
+    # JPEG bytes, or None for PDFs and anything else Pillow cannot read.
+    try:
+        from PIL import Image, ImageOps
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        image.convert("RGB").save(out, format="JPEG", quality=quality, optimize=True)
+    except Exception:
+        return None
+    return out.getvalue()
+
+
+def put(url, data):
+    # `data` is the full image; only the thumbnail is stored. Returns whether
+    # there was anything to store.
+    thumb = make(data)
+    if thumb is None:
+        return False
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    tmp = _path(url) + f".{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(thumb)
+    os.replace(tmp, _path(url))
+    evict()
+    return True
+
+
+def get(url):
+    path = _path(url)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except OSError:
+        return None
+    return data
+
+
+def data_uri(url):
+    thumb = get(url)
+    return "data:image/jpeg;base64," + base64.b64encode(thumb).decode() if thumb else None
+
+
+def evict(max_bytes=MAX_BYTES):
+    try:
+        entries = [e for e in os.scandir(THUMB_DIR) if e.name.endswith(".jpg")]
+    except FileNotFoundError:
+        return
+    stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+    total = sum(size for _, size, _ in stats)
+    for _, size, path in sorted(stats):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _fetch(url):
+    try:
+        import httpx
+        response = httpx.get(url, follow_redirects=True, timeout=30)
+        response.raise_for_status()
+        stored = put(url, response.content)
+    except Exception:
+        stored = False
+    if not stored:
+        # No preview (e.g. a PDF); the View link still works. Not retried
+        # until the process restarts.
+        with _lock:
+            _failed.add(url)
+    with _lock:
+        _inflight.discard(url)
+
+
+def prefetch(urls):
+    # Queues previews for URLs not cached yet; returns immediately.
+    for url in urls:
+        if not url or os.path.exists(_path(url)):
+            continue
+        with _lock:
+            if url in _inflight or url in _failed:
+                continue
+            _inflight.add(url)
+        _pool.submit(_fetch, url)
+
+
+def drain():
+    # Waits for every queued preview; for one-shot runs of the sync worker.
+    _pool.shutdown(wait=True)
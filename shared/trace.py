@@ -0,0 +1,141 @@
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+from shared.config import setting
+from shared.metrics import Metrics
+
+# Span timing for the hot path of each rerun (fetch, decode, aggregate,
+# render). Every span feeds a process-wide histogram; spans of a full-page
+# rerun are also collected so finish() can log them as one JSON line and, with
+# ?debug=1 in the URL, draw them as a waterfall. A span costs two
+# perf_counter() calls and a dict update.
+#   METRICS_PORT=9100 -> Prometheus text on http://host:9100/metrics
+#   TRACE_LOG_LEVEL=WARNING -> silence the per-rerun JSON lines
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+METRICS_PORT = setting("METRICS_PORT")
+
+STAGES = Metrics(buckets=STAGE_BUCKETS)
+_local = threading.local()
+
+log = logging.getLogger("budget_tracker.trace")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(setting("TRACE_LOG_LEVEL") or "INFO")
+    log.propagate = False
+
+
+def begin(script):
+    # Call at the top of a page script. Fragment-only reruns don't pass here,
+    # so their spans reach the metrics but not the log or the panel.
+    _local.run = {"script": script, "started": time.perf_counter(), "spans": []}
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        STAGES.observe(name, seconds, "ok")
+        run = getattr(_local, "run", None)
+        if run is not None:
+            run["spans"].append((name, started - run["started"], seconds))
+
+
+def finish():
+    # Call at the end of a page script.
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if METRICS_PORT:
+        _metrics_server()
+    if run is None:
+        return
+    total = time.perf_counter() - run["started"]
+    STAGES.observe("rerun", total, "ok")
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps({
+            "event": "rerun",
+            "script": run["script"],
+            "ms": round(total * 1000, 2),
+            "spans": [{"name": n, "start_ms": round(s * 1000, 2), "ms": round(d * 1000, 2)} for n, s, d in run["spans"]],
+        }))
+    if st.query_params.get("debug") == "1":
+        _panel(run["spans"], total)
+
+
+def _panel(spans, total):
+    scale = 100 / total if total else 0
+    rows = "".join(
+        '<div style="display:flex; align-items:center; gap:8px; margin:2px 0;">'
+        f'<span style="width:90px; color:#888;">{name}</span>'
+        '<div style="flex:1; position:relative; height:12px; background:#f5f5f5;">'
+        f'<div style="position:absolute; left:{start * scale:.2f}%; width:{max(seconds * scale, 0.5):.2f}%;'
+        ' height:100%; background:#333333;"></div></div>'
+        f'<span style="width:70px; text-align:right;">{seconds * 1000:.1f} ms</span></div>'
+        for name, start, seconds in spans
+    )
+    with st.expander(f"⏱ This rerun: {total * 1000:.1f} ms", expanded=True):
+        st.markdown(rows or "No spans recorded.", unsafe_allow_html=True)
+
+
+def _histogram(lines, metric, label, snapshot, buckets):
+    lines.append(f"# TYPE {metric} histogram")
+    for key, e in sorted(snapshot.items()):
+        cumulative = 0
+        for bound, count in zip(buckets, e["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{metric}_bucket{{{label}="{key}",le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{{label}="{key}"}} {e["sum"]:.6f}')
+        lines.append(f'{metric}_count{{{label}="{key}"}} {e["count"]}')
+
+
+def prometheus():
+    from shared import transport
+
+    lines = []
+    _histogram(lines, "budget_stage_seconds", "stage", STAGES.snapshot(), STAGES.buckets)
+    notion = transport.METRICS.snapshot()
+    _histogram(lines, "notion_request_seconds", "endpoint", notion, transport.METRICS.buckets)
+    lines.append("# TYPE notion_responses_total counter")
+    for key, e in sorted(notion.items()):
+        for status, count in sorted(e["statuses"].items()):
+            lines.append(f'notion_responses_total{{endpoint="{key}",status="{status}"}} {count}')
+    lines.append("# TYPE notion_circuit_open gauge")
+    lines.append(f"notion_circuit_open {int(transport.BREAKER.state == 'open')}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@st.cache_resource
+def _metrics_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("0.0.0.0", int(METRICS_PORT)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,155 @@
+import random
+import re
+import threading
+import time
+
+import httpx
+
+from shared.metrics import Metrics
+
+# httpx transport under the Notion client. Every request in the process
+# passes through one token bucket, is retried on 429 (and on 5xx when the
+# request is safe to repeat) honouring Retry-After, and is timed per endpoint.
+# A circuit breaker stops hammering Notion while it is failing.
+
+# Notion allows an average of three requests per second. The bucket holds a
+# single token and refills a hair under that, so even a strict one-second
+# window never sees a fourth request when arrivals jitter by a few ms.
+RATE = 2.95
+BURST = 1
+MAX_RETRIES = 5
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+_ID = re.compile(r"/[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}")
+
+
+class CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self, seconds):
+        # After a 429 nobody in the process should send for `seconds`.
+        # Several requests throttled together wait once, not once each.
+        with self.lock:
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # Half-open: let one request through after the cooldown.
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record(self, ok):
+        with self.lock:
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        return "closed" if self.opened_at is None else "open"
+
+
+BUCKET = TokenBucket()
+BREAKER = CircuitBreaker()
+METRICS = Metrics()
+
+
+def endpoint(request):
+    return f"{request.method} {_ID.sub('/{id}', request.url.path)}"
+
+
+def _retry_after(response, attempt):
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return min(30.0, 0.5 * 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+def _retryable(request, status):
+    if status == 429:
+        return True
+    # A 5xx on pages.create may still have created the page; only repeat
+    # reads and updates.
+    creating = request.method == "POST" and request.url.path.rstrip("/").endswith("/v1/pages")
+    return status in (500, 502, 503, 504) and not creating
+
+
+class NotionTransport(httpx.BaseTransport):
+    def __init__(self, inner=None, bucket=BUCKET, breaker=BREAKER, metrics=METRICS, max_retries=MAX_RETRIES):
+        self.inner = inner or httpx.HTTPTransport()
+        self.bucket = bucket
+        self.breaker = breaker
+        self.metrics = metrics
+        self.max_retries = max_retries
+
+    def handle_request(self, request):
+        name = endpoint(request)
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Notion is failing; requests are paused for a moment", request=request)
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.inner.handle_request(request)
+            except httpx.TransportError:
+                self.metrics.observe(name, time.perf_counter() - started, "error")
+                self.breaker.record(False)
+                raise
+            self.metrics.observe(name, time.perf_counter() - started, str(response.status_code))
+
+            if response.status_code < 500:
+                self.breaker.record(True)
+            else:
+                self.breaker.record(False)
+            if attempt == self.max_retries or not _retryable(request, response.status_code):
+                return response
+
+            delay = _retry_after(response, attempt)
+            response.close()
+            if response.status_code == 429:
+                self.bucket.drain(delay)
+            else:
+                time.sleep(delay)
+        return response
+
+    def close(self):
+        self.inner.close()
@@ -0,0 +1,162 @@
+import streamlit as st
+
+from shared import data, schema
+
+# Styling and navigation shared by the three pages. The CSS is one module
+# constant, built once per process instead of once per page script.
+
+CSS = """
+    <style>
+    [data-testid="stToolbar"], footer, header {visibility: hidden !important;}
+    [data-testid="stSidebar"] {display: none !important;}
+    [data-testid="collapsedControl"] {display: none !important;}
+    .main { background-color: #ffffff; }
+
+    html, body, [class*="st-"], .stSelectbox, .stTextInput, .stNumberInput, label, button, td, th, p {
+        font-size: 14px !important;
+    }
+
+    [data-testid="stMetricLabel"],
+    [data-testid="stMetricLabel"] * {
+        font-size: 18px !important;
+    }
+
+    [data-testid="stMetricValue"],
+    [data-testid="stMetricValue"] * {
+        font-size: 16px !important;
+    }
+
+    /* All buttons blue by default */
+    .stButton > button {
+        width: 100%;
+        border-radius: 10px;
+        height: 3.2em;
+        background-color: #007AFF !important;
+        color: white !important;
+        font-weight: bold;
+        border: none !important;
+        transition: 0.2s;
+    }
+
+    .stButton > button:hover {
+        background-color: #0056b3 !important;
+    }
+
+    /* Green primary button */
+    button[data-testid="stBaseButton-primary"],
+    button[data-testid="stBaseButton-primary"]:focus,
+    button[data-testid="stBaseButton-primary"]:active,
+    .st-emotion-cache-16rr57l {
+        background-color: #34C759 !important;
+        border-color: #34C759 !important;
+    }
+
+    button[data-testid="stBaseButton-primary"]:hover {
+        background-color: #28A745 !important;
+        border-color: #28A745 !important;
+    }
+
+    /* HTML nav buttons */
+    .nav-button {
+        background: #ffffff;
+        border: 1px solid #e0e0e0;
+        border-radius: 8px;
+        padding: 6px 12px;
+        font-size: 12px;
+        cursor: pointer;
+        transition: 0.2s;
+        color: #333333 !important;
+        text-decoration: none !important;
+    }
+
+    .nav-button:hover { background: #f0f0f0 !important; }
+    .nav-button:active { background: #e0e0e0 !important; }
+
+    a .nav-button, a:visited .nav-button, a:hover .nav-button {
+        color: #333333 !important;
+        text-decoration: none !important;
+    }
+
+    div[data-baseweb="select"] > div,
+    div[data-baseweb="input"] > div {
+        background-color: #f8f9fb !important;
+        border: 1px solid #e0e0e0 !important;
+        border-radius: 8px !important;
+    }
+
+    table { width: 100%; }
+    </style>
+    """
+
+# Wolfie's Fund: bold metric labels and a green progress bar.
+WOLFIE_CSS = """
+    <style>
+    [data-testid="stMetricLabel"],
+    [data-testid="stMetricLabel"] * {
+        font-weight: bold !important;
+    }
+
+    .st-dc {
+        background-color: #34C759 !important;
+    }
+    </style>
+    """
+
+PAGES = [
+    ("/", "💰 Budget Tracker"),
+    ("/Wolfie", "🐾 Wolfie's Fund"),
+    ("/Tax_Receipts", "🧾 Tax Receipts"),
+]
+
+
+def _nav(current):
+    links = "".join(
+        f'<a href="{href}" target="_self" style="text-decoration:none;">'
+        f'<button class="nav-button">{label}</button>'
+        '</a>'
+        for href, label in PAGES if href != current
+    )
+    return f'<div style="display:flex; gap:8px; margin-bottom:8px;">{links}</div>'
+
+
+def header(title, current, extra_css=""):
+    # Styles, title and links to the other two pages.
+    st.markdown(CSS + extra_css, unsafe_allow_html=True)
+    st.title(title)
+    st.markdown(_nav(current), unsafe_allow_html=True)
+    st.write("")
+
+
+def ok_to_add(duplicates, properties, button):
+    # False (with a warning) the first time an entry with likely duplicates
+    # is submitted; clicking `button` again with the same entry adds it.
+    if not duplicates or st.session_state.get("_duplicate_warned") == properties:
+        st.session_state.pop("_duplicate_warned", None)
+        return True
+    st.session_state._duplicate_warned = properties
+    count = len(duplicates)
+    st.warning(
+        f"⚠️ {count} entr{'y' if count == 1 else 'ies'} with the same date, amount, store and person "
+        f"already exist{'s' if count == 1 else ''}. Click **{button}** again to add it anyway."
+    )
+    return False
+
+
+@st.fragment
+def duplicates_section(database_id, fields, columns):
+    # Batch report of every group of likely duplicates, behind a toggle.
+    if not st.toggle("🔁 Find duplicates", key="duplicates_toggle"):
+        return
+    try:
+        report = data.duplicates_report(database_id, fields)
+        if report.empty:
+            st.success("No likely duplicates found.")
+            return
+        st.caption(f"{report['Group'].nunique()} group(s) with the same date, amount, store and person")
+        money = [f.column for f in fields if f.kind == "money"]
+        st.dataframe(
+            report.assign(**{c: report[c].map(schema.dollars) for c in money})[["Group"] + columns],
+            hide_index=True,
+        )
+    except Exception as e:
+        st.error(f"Error: {e}")
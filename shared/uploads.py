@@ -0,0 +1,109 @@
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from shared import mirror, thumbs
+
+# Receipt photos are shrunk on the server before they go to Cloudinary, and
+# all photos of a receipt are uploaded at the same time. Every upload is
+# indexed by the SHA-256 of the original bytes, so the same photo sent again
+# reuses the first URL without compressing or uploading anything.
+MAX_DIMENSION = int(os.environ.get("RECEIPT_MAX_DIMENSION", "2000"))
+JPEG_QUALITY = int(os.environ.get("RECEIPT_JPEG_QUALITY", "80"))
+UPLOAD_WORKERS = 4
+
+
+def compress(name, data, max_dimension=MAX_DIMENSION, quality=JPEG_QUALITY):
+    # Returns (name, bytes). PDFs and anything Pillow cannot read pass through.
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in (".jpg", ".jpeg", ".png"):
+        return name, data
+    try:
+        from PIL import Image, ImageOps
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+    except Exception:
+        return name, data
+
+    image.thumbnail((max_dimension, max_dimension))
+    out = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P") and ext == ".png":
+        image.save(out, format="PNG", optimize=True)
+        new_name = name
+    else:
+        image.convert("RGB").save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+        new_name = os.path.splitext(name)[0] + ".jpg"
+
+    if out.tell() >= len(data):
+        return name, data
+    return new_name, out.getvalue()
+
+
+def cloudinary_upload(name, data, folder="tax_receipts"):
+    import cloudinary
+    import cloudinary.uploader
+    cloudinary.config(
+        cloud_name=os.environ.get("CLOUDINARY_CLOUD_NAME"),
+        api_key=os.environ.get("CLOUDINARY_API_KEY"),
+        api_secret=os.environ.get("CLOUDINARY_API_SECRET")
+    )
+    stream = io.BytesIO(data)
+    stream.name = name
+    result = cloudinary.uploader.upload(stream, folder=folder)
+    return result.get("secure_url", "")
+
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_index (
+    sha256 TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    created REAL NOT NULL
+)
+"""
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def known(digests):
+    # {sha256: url} for the digests uploaded before.
+    with mirror.connect() as conn:
+        conn.execute(_INDEX_SCHEMA)
+        rows = conn.execute(
+            f"SELECT sha256, url FROM upload_index WHERE sha256 IN ({','.join('?' * len(digests))})", list(digests)
+        ).fetchall()
+    return dict(rows)
+
+
+def remember(sha256, url):
+    with mirror.connect() as conn:
+        conn.execute(_INDEX_SCHEMA)
+        conn.execute("INSERT OR REPLACE INTO upload_index (sha256, url, created) VALUES (?, ?, ?)", (sha256, url, time.time()))
+
+
+def upload_all(files, upload=cloudinary_upload, workers=UPLOAD_WORKERS, **compress_options):
+    # `files` are (name, bytes) pairs; URLs come back in the same order, with
+    # repeated photos listed once.
+    def work(item):
+        sha256, (name, data) = item
+        url = upload(*compress(name, data, **compress_options))
+        if url:
+            remember(sha256, url)
+            thumbs.put(url, data)
+        return sha256, url
+
+    if not files:
+        return []
+    digests = [digest(data) for _, data in files]
+    urls = known(set(digests))
+    todo = {}
+    for sha256, item in zip(digests, files):
+        if sha256 not in urls:
+            todo.setdefault(sha256, item)
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            urls.update(pool.map(work, todo.items()))
+    return list(dict.fromkeys(urls[d] for d in digests if urls.get(d)))
@@ -0,0 +1,149 @@
+import argparse
+import logging
+import threading
+import time
+
+from shared import bulk, data, mirror, outbox, receipts_table, rounds, schema, thumbs
+from shared.config import DATABASE_ID, SPLIT_WEIGHTS, TAX_DATABASE_ID
+
+# Standalone sync process. It keeps the local mirror of all three databases
+# current, flushes the outbox (Notion pages and Cloudinary uploads) and caches
+# receipt thumbnails. Streamlit processes started with SYNC_WORKER=1 then only
+# read the mirror and enqueue writes, so adding web processes adds no Notion
+# traffic. They must all see this worker's MIRROR_PATH and THUMB_CACHE_DIR.
+# Every --reconcile seconds (and when a page's Refresh asks) the sync reads
+# every page, to drop pages deleted or trashed in Notion. It also runs the
+# budget's "Clear & Start New Round" jobs and the one-time round backfill.
+# A heartbeat lets the web processes take over (data.worker_active()) if
+# this process dies; a failing pass is logged and the loop carries on.
+#   python sync_worker.py [--interval 60] [--reconcile 900] [--once]
+
+TICK_SECONDS = 1.0
+RECONCILE_SECONDS = 900
+HEARTBEAT_SECONDS = 5.0
+
+logger = logging.getLogger("budget_tracker.sync")
+
+
+def sync(notion, database_id, full=False):
+    _, properties, archived_property = data.FRAMES[database_id]
+    started = time.perf_counter()
+    count = mirror.sync(notion, database_id, properties=properties, archived_property=archived_property, full=full)
+    logger.info("%s %s: %d page(s) in %.0f ms", "reconciled" if full else "synced", database_id, count,
+                (time.perf_counter() - started) * 1000)
+
+
+def prefetch_thumbnails():
+    # The receipts a page opens on: the first page of "All" and of each year.
+    df = schema.decode(mirror.iter_pages(TAX_DATABASE_ID), schema.TAX)
+    if df.empty:
+        return
+    size = receipts_table.PAGE_SIZES[-1]
+    urls = set(df["Receipt URL"].head(size)) | set(df.groupby("Year")["Receipt URL"].head(size))
+    thumbs.prefetch(url.split(" | ", 1)[0] for url in urls if url)
+
+
+def _heartbeat():
+    while True:
+        try:
+            mirror.beat()
+        except Exception:
+            logger.exception("heartbeat failed")
+        time.sleep(HEARTBEAT_SECONDS)
+
+
+def clear_rounds(notion, retry):
+    # Requested clears, and on periodic passes (retry) archiving a failed
+    # clear left behind.
+    if not DATABASE_ID or not (rounds.clear_requested(DATABASE_ID) or (retry and bulk.pending(DATABASE_ID))):
+        return
+    done, failed = rounds.run_clear(notion, DATABASE_ID, SPLIT_WEIGHTS)
+    logger.info("round clear: %d archived, %d failed", len(done), len(failed))
+
+
+class Loop:
+    def __init__(self, notion, interval, reconcile):
+        self.notion = notion
+        self.interval = interval
+        self.reconcile = reconcile
+        self.databases = [database_id for database_id in data.FRAMES if database_id]
+        self.next_sync = self.next_reconcile = 0.0
+        self.thumbs_version = None
+
+    def tick(self):
+        # One pass; returns the number of outbox entries flushed.
+        # {database_id: full}; a periodic pass also answers pending requests.
+        due = {database_id: full for database_id, full in mirror.take_sync_requests().items()
+               if database_id in self.databases}
+        now = time.monotonic()
+        periodic = now >= self.next_sync
+        if periodic:
+            full = now >= self.next_reconcile
+            due = {database_id: full or due.get(database_id, False) for database_id in self.databases}
+            self.next_sync = now + self.interval
+            if full:
+                self.next_reconcile = now + self.reconcile
+        for database_id, full in due.items():
+            try:
+                sync(self.notion, database_id, full)
+            except Exception:
+                logger.exception("sync of %s failed", database_id)
+
+        try:
+            flushed = outbox.flush(self.notion)
+        except Exception:
+            logger.exception("outbox flush failed")
+            flushed = 0
+
+        try:
+            clear_rounds(self.notion, periodic)
+        except Exception:
+            logger.exception("round clear failed")
+
+        if periodic and DATABASE_ID and not rounds.backfilled(DATABASE_ID):
+            try:
+                logger.info("backfilled %d past round(s)", rounds.backfill(self.notion, DATABASE_ID, SPLIT_WEIGHTS))
+            except Exception:
+                logger.exception("round backfill failed")
+
+        if TAX_DATABASE_ID in due and mirror.version(TAX_DATABASE_ID) != self.thumbs_version:
+            self.thumbs_version = mirror.version(TAX_DATABASE_ID)
+            try:
+                prefetch_thumbnails()
+            except Exception:
+                logger.exception("thumbnail prefetch failed")
+        return flushed
+
+
+def run(interval=data.SYNC_TTL, reconcile=RECONCILE_SECONDS, once=False):
+    notion = data.new_client()
+    threading.Thread(target=_heartbeat, daemon=True, name="heartbeat").start()
+    loop = Loop(notion, interval, reconcile)
+    while True:
+        try:
+            flushed = loop.tick()
+        except Exception:
+            # E.g. the mirror locked or its disk full: wait a tick and go on.
+            logger.exception("sync pass failed")
+            flushed = 0
+        if once:
+            thumbs.drain()
+            return
+        if not flushed:
+            time.sleep(TICK_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the Notion databases into the local mirror.")
+    parser.add_argument("--interval", type=float, default=data.SYNC_TTL, help="seconds between full sync passes")
+    parser.add_argument("--reconcile", type=float, default=RECONCILE_SECONDS,
+                        help="seconds between full syncs that drop pages deleted in Notion")
+    parser.add_argument("--once", action="store_true", help="sync and flush once, then exit")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    run(args.interval, args.reconcile, args.once)
+
+
+if __name__ == "__main__":
+    main()
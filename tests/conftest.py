@@ -0,0 +1,41 @@
+import httpx
+import pytest
+from notion_client import Client
+
+from benchmarks.fake_notion import FakeNotion
+from shared import mirror
+from shared.metrics import Metrics
+from shared.transport import CircuitBreaker, NotionTransport, TokenBucket
+
+# Every test gets its own mirror file and, when it asks for `notion`, a local
+# FakeNotion behind a NotionTransport with its own (fast) bucket and breaker.
+#   python -m pytest -q
+
+
+@pytest.fixture(autouse=True)
+def mirror_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(mirror, "MIRROR_PATH", str(tmp_path / "mirror.db"))
+
+
+@pytest.fixture
+def fake():
+    server = FakeNotion().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def notion(fake):
+    transport = NotionTransport(bucket=TokenBucket(rate=1000, burst=1000), breaker=CircuitBreaker(), metrics=Metrics())
+    return Client(auth="test", base_url=fake.url, client=httpx.Client(transport=transport))
+
+
+def expense(item="Safeway", cost=12.5, who="Leandro", date="2026-10-01"):
+    # Budget page properties, as the form and the fake store them.
+    return {
+        "Item": {"title": [{"text": {"content": item}}]},
+        "Cost": {"number": cost},
+        "Who": {"select": {"name": who}},
+        "Date": {"date": {"start": date}},
+        "Archived": {"checkbox": False},
+    }
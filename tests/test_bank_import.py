@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from shared import bank_import
+
+RULES = bank_import.rules_for(["Safeway", "Walmart", "Others"])
+
+
+def test_parse_reads_a_statement():
+    statement = io.BytesIO(
+        b"Date,Description,Amount\n"
+        b"2026-10-01,SAFEWAY #123,-12.50\n2026-10-02,Wal-Mart,-3\n2026-10-03,Refund,5.00\n"
+    )
+    rows = bank_import.parse(statement, RULES)
+    assert [(r["Merchant"], r["Category"], r["Cost"], r["Expense"]) for r in rows] == [
+        ("SAFEWAY #123", "Safeway", 12.5, True),
+        ("Wal-Mart", "Walmart", 3.0, True),
+        ("Refund", "Others", 5.0, False),
+    ]
+
+
+@pytest.mark.parametrize("content", [
+    b"\xff\xfe\x00\x00binary",  # Not UTF-8.
+    b"Date,Description,Amount\n\"" + b"x" * 200_000,  # A quote that never closes.
+])
+def test_parse_reports_unreadable_files_as_format_errors(content):
+    with pytest.raises(bank_import.ImportFormatError):
+        bank_import.parse(io.BytesIO(content), RULES)
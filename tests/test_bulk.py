@@ -0,0 +1,32 @@
+import time
+
+import httpx
+from notion_client import Client
+
+from benchmarks.fake_notion import FakeNotion
+from shared import bulk
+from shared.metrics import Metrics
+from shared.transport import CircuitBreaker, NotionTransport, TokenBucket
+from tests.conftest import expense
+
+DB = "test-budget"
+
+
+def test_archive_beats_serial_without_being_throttled():
+    latency = 0.6
+    fake = FakeNotion(latency=latency, rate_limit=3).start()
+    try:
+        page_ids = [fake.add_page(DB, expense(f"Item {i}"))["id"] for i in range(9)]
+        transport = NotionTransport(bucket=TokenBucket(), breaker=CircuitBreaker(), metrics=Metrics())
+        notion = Client(auth="test", base_url=fake.url, client=httpx.Client(transport=transport))
+        bulk.start(DB, page_ids)
+        started = time.perf_counter()
+        done, failed = bulk.archive_pending(notion, DB)
+        elapsed = time.perf_counter() - started
+        assert (len(done), failed, fake.throttled) == (9, [], 0)
+        assert all(page["properties"]["Archived"]["checkbox"] for page in fake.live(DB))
+        # One request after another would take latency * rows.
+        assert elapsed < latency * len(page_ids) * 0.8
+        assert bulk.pending(DB) == []
+    finally:
+        fake.stop()
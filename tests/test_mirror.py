@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from shared import dedup, mirror, rollups, schema
+from tests.conftest import expense
+
+DB = "test-budget"
+
+
+@pytest.fixture(autouse=True)
+def specs(monkeypatch):
+    monkeypatch.setitem(dedup.SPECS, DB, schema.BUDGET_DEDUP)
+    monkeypatch.setitem(rollups.SPECS, DB, (schema._pick(schema.BUDGET, "Who"), schema._pick(schema.BUDGET, "Cost")[0]))
+
+
+def sync(notion, full=False):
+    return mirror.sync(notion, DB, properties=schema.BUDGET_PROPERTIES, archived_property="Archived", full=full)
+
+
+def ids():
+    return {page["id"] for page in mirror.iter_pages(DB)}
+
+
+def test_incremental_sync_picks_up_new_pages(fake, notion):
+    first = fake.add_page(DB, expense("Safeway"))
+    assert sync(notion) == 1
+    second = fake.add_page(DB, expense("Walmart"))
+    sync(notion)
+    assert ids() == {first["id"], second["id"]}
+
+
+def test_full_sync_drops_pages_deleted_in_notion(fake, notion):
+    kept = fake.add_page(DB, expense("Safeway", who="Leandro"))
+    gone = fake.add_page(DB, expense("Walmart", who="Jonas"))
+    sync(notion)
+    fake.trash(gone["id"])
+
+    sync(notion)
+    assert gone["id"] in ids()  # An incremental sync cannot see deletions.
+
+    before = mirror.version(DB)
+    sync(notion, full=True)
+    assert ids() == {kept["id"]}
+    assert mirror.version(DB) > before
+    with mirror.connect() as conn:
+        assert rollups.totals(conn, DB)["Who"].tolist() == ["Leandro"]
+        assert dedup.matches(conn, DB, expense("Walmart", who="Jonas")) == []
+
+
+def test_full_sync_without_changes_keeps_the_version(fake, notion):
+    fake.add_page(DB, expense())
+    sync(notion, full=True)
+    before = mirror.version(DB), mirror.get_cursor(DB)
+    assert sync(notion, full=True) == 0
+    assert (mirror.version(DB), mirror.get_cursor(DB)) == before
+
+
+def test_incremental_sync_without_changes_keeps_the_version(fake, notion):
+    fake.add_page(DB, expense())
+    sync(notion)
+    before = mirror.version(DB)
+    # The cursor minute is re-read every time; an unchanged page is not rewritten.
+    assert [sync(notion) for _ in range(3)] == [0, 0, 0]
+    assert mirror.version(DB) == before
+
+
+def test_sync_does_not_hold_the_write_lock_while_fetching(fake, notion, monkeypatch):
+    for i in range(150):  # Two batches: a write after the first would hold the lock.
+        fake.add_page(DB, expense(f"Item {i}"))
+    mirror.get_cursor(DB)
+    fetch = mirror.iter_batches
+
+    def fetch_and_write(*args, **kwargs):
+        for batch in fetch(*args, **kwargs):
+            with sqlite3.connect(mirror.MIRROR_PATH, timeout=0) as conn:
+                conn.execute("INSERT OR REPLACE INTO sync_requests (database_id, requested_at) VALUES ('other', 0)")
+            yield batch
+
+    monkeypatch.setattr(mirror, "iter_batches", fetch_and_write)
+    assert sync(notion) == 150
+
+
+def test_archived_pages_leave_the_mirror(fake, notion):
+    page = fake.add_page(DB, expense())
+    sync(notion)
+    notion.pages.update(page_id=page["id"], properties={"Archived": {"checkbox": True}})
+    sync(notion)
+    assert ids() == set()
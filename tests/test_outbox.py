@@ -0,0 +1,126 @@
+import threading
+
+from shared import mirror, outbox
+from tests.conftest import expense
+
+DB = "test-budget"
+
+
+def creates(fake):
+    return sum(1 for method, path in fake.calls if method == "POST" and path == "/v1/pages")
+
+
+def due_now():
+    # Skips the backoff, as if its time had come.
+    with mirror.connect() as conn:
+        conn.execute("UPDATE outbox SET next_attempt = 0")
+
+
+def test_flush_creates_pages_and_swaps_in_the_mirror(fake, notion):
+    outbox.enqueue_many(DB, [expense("Safeway"), expense("Walmart")])
+    assert [page["id"].startswith(outbox.ID_PREFIX) for page in outbox.pending_pages(DB)] == [True, True]
+    assert outbox.flush(notion) == 2
+    assert outbox.entries(DB) == []
+    assert len(fake.live(DB)) == 2
+    assert {page["id"] for page in mirror.iter_pages(DB)} == {page["id"] for page in fake.live(DB)}
+
+
+def test_failed_create_is_not_resent_in_process(fake, notion):
+    outbox.enqueue(DB, expense())
+    fake.failing_creates = 1
+    outbox.flush(notion)
+    assert creates(fake) == 1
+    [entry] = outbox.entries(DB)
+    assert (entry["status"], entry["attempts"]) == ("pending", 1)
+
+
+def test_retry_finds_the_page_a_failed_create_made(fake, notion):
+    outbox.enqueue_many(DB, [expense(cost=10.0), expense(cost=10.0), expense(cost=20.0)])
+    fake.failing_creates = 3
+    outbox.flush(notion)
+    assert len(fake.live(DB)) == 3
+
+    due_now()
+    outbox.flush(notion)
+    assert creates(fake) == 3
+    assert outbox.entries(DB) == []
+    assert len(fake.live(DB)) == 3
+    assert len(list(mirror.iter_pages(DB))) == 3
+
+
+def test_retry_does_not_take_someone_elses_page(fake, notion):
+    # Same title, amount, person and date, mirrored before the create failed.
+    theirs = fake.add_page(DB, expense())
+    mirror.sync(notion, DB)
+    outbox.enqueue(DB, expense())
+    fake.failing_creates = 1
+    outbox.flush(notion)
+    [created] = [page for page in fake.live(DB) if page["id"] != theirs["id"]]
+
+    due_now()
+    outbox.flush(notion)
+    assert outbox.entries(DB) == []
+    assert {page["id"] for page in mirror.iter_pages(DB)} == {theirs["id"], created["id"]}
+    assert creates(fake) == 1
+
+
+def test_manual_retry_still_checks_first(fake, notion, monkeypatch):
+    monkeypatch.setattr(outbox, "MAX_ATTEMPTS", 1)
+    outbox.enqueue(DB, expense())
+    fake.failing_creates = 1
+    outbox.flush(notion)
+    [entry] = outbox.entries(DB)
+    assert entry["status"] == "failed"
+
+    outbox.retry(entry["key"])
+    outbox.flush(notion)
+    assert creates(fake) == 1
+    assert len(fake.live(DB)) == 1
+    assert outbox.entries(DB) == []
+
+
+def test_lookalike_entries_do_not_share_a_page(fake, notion):
+    # One of two identical entries fails after Notion stored its page: the
+    # retry must take that page, not the one the other entry created.
+    outbox.enqueue_many(DB, [expense(), expense()])
+    fake.failing_creates = 1
+    outbox.flush(notion)
+    assert len(fake.live(DB)) == 2
+    due_now()
+    outbox.flush(notion)
+    assert outbox.entries(DB) == []
+    assert len(list(mirror.iter_pages(DB))) == 2
+    assert creates(fake) == 2
+
+
+def test_concurrent_flushes_send_each_entry_once(fake, notion):
+    outbox.enqueue_many(DB, [expense("Safeway"), expense("Walmart")])
+    fake.latency = 0.2
+    flushers = [threading.Thread(target=outbox.flush, args=(notion,)) for _ in range(2)]
+    for flusher in flushers:
+        flusher.start()
+    for flusher in flushers:
+        flusher.join()
+    assert creates(fake) == 2
+    assert len(fake.live(DB)) == 2
+    assert outbox.entries(DB) == []
+
+
+def test_expired_lease_is_taken_over_without_a_duplicate(fake, notion):
+    outbox.enqueue(DB, expense())
+    # A flusher claims the entry, creates the page and dies before recording it.
+    [entry] = outbox._due()
+    notion.pages.create(parent={"database_id": DB}, properties=entry["properties"])
+    assert outbox.flush(notion) == 0  # Still leased.
+
+    with mirror.connect() as conn:
+        conn.execute("UPDATE outbox SET lease_until = 0")
+    assert outbox.flush(notion) == 1
+    assert creates(fake) == 1
+    assert outbox.entries(DB) == []
+
+
+def test_discard_drops_the_entry():
+    key = outbox.enqueue(DB, expense())
+    outbox.discard(key)
+    assert outbox.entries(DB) == []
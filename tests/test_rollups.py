@@ -0,0 +1,66 @@
+import pytest
+
+from shared import mirror, rollups, schema
+
+DB = "test-tax"
+
+
+@pytest.fixture(autouse=True)
+def spec(monkeypatch):
+    monkeypatch.setitem(rollups.SPECS, DB, schema.TAX_ROLLUP)
+
+
+def receipt(page_id, year, category, who, amount):
+    return {"id": page_id, "last_edited_time": "2026-01-01T00:00:00.000Z", "properties": {
+        "Date": {"date": {"start": f"{year}-01-01"}},
+        "Description": {"title": [{"text": {"content": page_id}}]},
+        "Amount": {"number": amount},
+        "Category": {"select": {"name": category}},
+        "Who": {"select": {"name": who}},
+        "Year": {"select": {"name": year}},
+    }}
+
+
+def totals(conn, extra=()):
+    df = rollups.totals(conn, DB, extra)
+    return {(r.Year, r.Category, r.Who): (r.Amount, r.Count) for r in df.itertuples()}
+
+
+def test_apply_adds_and_moves_pages_between_groups():
+    with mirror.connect() as conn:
+        rollups.apply(conn, DB, [], [receipt("a", "2025", "Health", "Jonas", 10.25),
+                                     receipt("b", "2025", "Health", "Jonas", 4.75)])
+        rollups.apply(conn, DB, [receipt("b", "2025", "Health", "Jonas", 4.75)],
+                      [receipt("b", "2026", "School", "Jonas", 5.0)])
+        rows = dict(conn.execute("SELECT grp, cents FROM rollups WHERE database_id = ?", (DB,)))
+    assert sorted(rows.values()) == [500, 1025]
+
+
+def test_write_pages_keeps_totals_current():
+    with mirror.connect() as conn:
+        mirror.write_pages(conn, DB, [receipt("a", "2025", "Health", "Jonas", 10.0),
+                                      receipt("b", "2025", "Health", "Jonas", 5.0),
+                                      receipt("c", "2025", "School", "Leandro", 7.5)])
+        mirror.write_pages(conn, DB, [receipt("b", "2025", "Health", "Jonas", 6.0)])
+        assert totals(conn) == {("2025", "Health", "Jonas"): (1600, 2), ("2025", "School", "Leandro"): (750, 1)}
+        mirror._remove(conn, DB, ["c"])
+        assert totals(conn) == {("2025", "Health", "Jonas"): (1600, 2)}
+
+
+def test_totals_add_extra_pages():
+    with mirror.connect() as conn:
+        mirror.write_pages(conn, DB, [receipt("a", "2025", "Health", "Jonas", 10.0)])
+        assert totals(conn, [receipt("outbox:1", "2025", "Health", "Jonas", 2.5)]) == {
+            ("2025", "Health", "Jonas"): (1250, 2)
+        }
+
+
+def test_changed_spec_is_rebuilt(monkeypatch):
+    with mirror.connect() as conn:
+        mirror.write_pages(conn, DB, [receipt("a", "2025", "Health", "Jonas", 10.0),
+                                      receipt("b", "2026", "School", "Jonas", 5.0)])
+        totals(conn)
+        by_who = schema._pick(schema.TAX, "Who")
+        monkeypatch.setitem(rollups.SPECS, DB, (by_who, schema.TAX_ROLLUP[1]))
+        df = rollups.totals(conn, DB)
+    assert df.to_dict("records") == [{"Who": "Jonas", "Amount": 1500, "Count": 2}]
@@ -0,0 +1,86 @@
+import sys
+import threading
+
+import pandas as pd
+
+from shared import schema, search
+
+
+def receipts(rows):
+    # rows: (id, date, description, cents, who)
+    return pd.DataFrame({
+        "id": [r[0] for r in rows],
+        "Date": [r[1] for r in rows],
+        "Description": [r[2] for r in rows],
+        "Amount": [r[3] for r in rows],
+        "Category": ["Health"] * len(rows),
+        "Who": [r[4] for r in rows],
+        "Year": [r[1][:4] for r in rows],
+        "Receipt URL": [""] * len(rows),
+    })
+
+
+ROWS = [
+    ("a", "2025-03-02", "Walmart groceries", 4520, "Leandro"),
+    ("b", "2025-04-10", "Physio session", 9000, "Jonas"),
+    ("c", "2024-03-15", "Walmart pharmacy", 1250, "Jonas"),
+]
+
+
+def test_query_matches_every_word_as_a_prefix():
+    index = search.SearchIndex(schema.TAX)
+    index.refresh(receipts(ROWS))
+    assert index.query("walmart") == [0, 2]
+    assert index.query("wal jon") == [2]
+    assert index.query("march 2025") == [0]
+    assert index.query("45") == [0]
+    assert index.query("2025-04") == [1]
+    assert index.query("dentist") == []
+    assert index.query("   ") == []
+
+
+def test_refresh_applies_edits_removals_and_new_order():
+    index = search.SearchIndex(schema.TAX)
+    index.refresh(receipts(ROWS))
+    edited = receipts([
+        ("d", "2025-05-01", "Walmart gas", 3000, "Leandro"),
+        ("c", "2024-03-15", "Dentist cleaning", 1250, "Jonas"),
+        ("a", "2025-03-02", "Walmart groceries", 4520, "Leandro"),
+    ])
+    assert index.refresh(edited) == 3  # b removed, c edited, d added
+    assert index.query("walmart") == [0, 2]
+    assert index.query("dentist") == [1]
+    assert index.query("physio") == []
+
+
+def test_refresh_with_the_same_frame_is_free():
+    index = search.SearchIndex(schema.TAX)
+    df = receipts(ROWS)
+    index.refresh(df)
+    assert index.refresh(df) == 0
+
+
+def test_search_returns_positions_in_the_frame_passed():
+    # Sessions share one index; another session's frame must not be queried
+    # in between refreshing and querying this one.
+    index = search.SearchIndex(schema.TAX)
+    frames = [receipts(ROWS), receipts([ROWS[1], ROWS[0], ROWS[2]])]
+    expected = [[0, 2], [1, 2]]
+    wrong = []
+
+    def session(i):
+        for _ in range(2000):
+            if index.search(frames[i], "walmart") != expected[i]:
+                wrong.append(i)
+
+    sessions = [threading.Thread(target=session, args=(i,)) for i in range(2)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads often enough to interleave.
+    try:
+        for thread in sessions:
+            thread.start()
+        for thread in sessions:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert wrong == []
@@ -0,0 +1,55 @@
+import pytest
+
+from shared import settlement
+from shared.config import _weights
+
+
+def test_shares_add_up_to_the_total():
+    assert settlement.shares(100, {"A": 1, "B": 1, "C": 1}) == {"A": 34, "B": 33, "C": 33}
+    assert sum(settlement.shares(1001, {"A": 2, "B": 1, "C": 0.5}).values()) == 1001
+
+
+def test_shares_reject_zero_weights():
+    with pytest.raises(ValueError):
+        settlement.shares(100, {"A": 0, "B": 0})
+
+
+def test_balances_split_by_weight():
+    assert settlement.balances({"A": 900, "B": 0}, {"A": 2, "B": 1}) == {"A": 300, "B": -300}
+
+
+def test_balances_leave_out_unknown_payers():
+    weights = {"A": 1, "B": 1}
+    spent = {"A": 1000, "B": 0, "Unknown": 500}
+    assert settlement.balances(spent, weights) == {"A": 500, "B": -500}
+    assert settlement.unsplit(spent, weights) == {"Unknown": 500}
+
+
+def test_balances_without_weights_split_evenly_between_payers():
+    assert settlement.balances({"A": 300, "B": 0}) == {"A": 150, "B": -150}
+    assert settlement.unsplit({"A": 300}) == {}
+
+
+def test_transfers_settle_every_balance():
+    balance = {"A": 500, "B": -200, "C": -250, "D": -50}
+    result = settlement.transfers(balance)
+    assert len(result) <= len(balance) - 1
+    settled = dict(balance)
+    for debtor, creditor, cents in result:
+        settled[debtor] += cents
+        settled[creditor] -= cents
+    assert set(settled.values()) == {0}
+
+
+def test_transfers_when_settled():
+    assert settlement.transfers({"A": 0, "B": 0}) == []
+
+
+@pytest.mark.parametrize("value", ["A:0,B:0", "A:-1,B:2"])
+def test_weights_rejected(value):
+    with pytest.raises(ValueError):
+        _weights(value)
+
+
+def test_weights_parsed():
+    assert _weights("A:1, B:0.5") == {"A": 1.0, "B": 0.5}
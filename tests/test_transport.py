@@ -0,0 +1,30 @@
+import threading
+
+import httpx
+from notion_client import Client
+
+from benchmarks.fake_notion import FakeNotion
+from shared.metrics import Metrics
+from shared.transport import RATE, CircuitBreaker, NotionTransport, TokenBucket
+
+
+def test_a_burst_is_paced_under_the_rate_limit():
+    fake = FakeNotion(rate_limit=3).start()
+    try:
+        transport = NotionTransport(bucket=TokenBucket(), breaker=CircuitBreaker(), metrics=Metrics())
+        notion = Client(auth="test", base_url=fake.url, client=httpx.Client(transport=transport))
+        burst = [threading.Thread(target=notion.databases.query, kwargs={"database_id": "db"}) for _ in range(8)]
+        for thread in burst:
+            thread.start()
+        for thread in burst:
+            thread.join()
+        assert (len(fake.calls), fake.throttled) == (8, 0)
+    finally:
+        fake.stop()
+
+
+def test_throttled_requests_drain_the_bucket_once():
+    bucket = TokenBucket()
+    bucket.drain(1.0)
+    bucket.drain(1.0)
+    assert bucket.tokens == 1 - RATE